@@ -4,18 +4,68 @@ A professional AI-powered tool for generating LinkedIn posts with advanced featu
 """
 
 import streamlit as st
-import sys
-import os
+import atexit
 from datetime import datetime
 from typing import Dict
 
-# Add src directory to Python path
-sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
-
 from src.config import Config
 from src.agents.linkedin_post_agent import LinkedInPostAgent
 from src.ui.components import UIComponents
 
+@st.cache_resource(show_spinner=False)
+def _build_client():
+    """Create the Gemini API client shared by every session in this process"""
+    from src.utils.gemini_client import create_client  # Defer loading the Gemini SDK until first use
+    
+    client = create_client()
+    
+    # The client lives for the whole process, so close its connections once at exit
+    atexit.register(client.close)
+    return client
+
+@st.cache_resource(show_spinner=False)
+def _build_agent() -> LinkedInPostAgent:
+    """Build and health-check the agent once per process, reusing it across reruns"""
+    agent = LinkedInPostAgent(client=_build_client())
+    health_status = agent.get_health_status()
+    if health_status["status"] != "healthy":
+        # Raising keeps the failed agent out of the cache so the next rerun retries
+        raise ConnectionError(health_status["message"])
+    return agent
+
+@st.cache_data(ttl=5, show_spinner=False)
+def _health_payload(agent_healthy: bool) -> Dict:
+    """Health check payload, reused for a few seconds to absorb bursts of probes"""
+    health_data = {
+        "status": "healthy",
+        "timestamp": str(datetime.now()),
+        "app": "LinkedIn Post Generator",
+        "version": "2.0.0",
+        "agent_status": "healthy" if agent_healthy else "unhealthy"
+    }
+    
+    if agent_healthy:
+        try:
+            agent_health = _build_agent().get_health_status()
+            health_data["model_info"] = agent_health.get("model_info", {})
+        except Exception as e:
+            health_data["agent_error"] = str(e)
+            health_data["status"] = "degraded"
+    
+    return health_data
+
+@st.cache_data(show_spinner=False)
+def _footer_features_md() -> str:
+    """Static feature list shown in the footer, sent as a single markdown element"""
+    return """
+    **AI Agent Features:**
+    - Multi-step content planning
+    - Trend analysis and research
+    - Content inspiration discovery
+    - Quality control & filtering
+    - Smart hashtag generation
+    """
+
 class LinkedInPostGeneratorApp:
     """Main application class"""
     
@@ -41,15 +91,13 @@ class LinkedInPostGeneratorApp:
                 st.error(f"Configuration Error: {'; '.join(config_errors)}")
                 st.stop()
             
-            # Initialize agent
-            self.agent = LinkedInPostAgent()
-            
-            # Test agent health
-            health_status = self.agent.get_health_status()
-            st.session_state.agent_healthy = health_status["status"] == "healthy"
-            
-            if not st.session_state.agent_healthy:
-                st.error("Agent initialization failed: " + health_status['message'])
+            # Initialize agent (built and health-checked once per process)
+            try:
+                self.agent = _build_agent()
+                st.session_state.agent_healthy = True
+            except ConnectionError as e:
+                st.session_state.agent_healthy = False
+                st.error("Agent initialization failed: " + str(e))
                 st.write("**Troubleshooting:**")
                 st.write("1. Check your GEMINI_API_KEY environment variable")
                 st.write("2. Ensure you have access to Google's Gemini API")
@@ -88,24 +136,9 @@ class LinkedInPostGeneratorApp:
     
     def _handle_health_check(self):
         """Handle health check endpoint"""
-        health_data = {
-            "status": "healthy",
-            "timestamp": str(datetime.now()),
-            "app": "LinkedIn Post Generator",
-            "version": "2.0.0",
-            "agent_status": "healthy" if st.session_state.agent_healthy else "unhealthy"
-        }
-        
-        if self.agent and st.session_state.agent_healthy:
-            try:
-                agent_health = self.agent.get_health_status()
-                health_data["model_info"] = agent_health.get("model_info", {})
-            except Exception as e:
-                health_data["agent_error"] = str(e)
-                health_data["status"] = "degraded"
-        
+        healthy = bool(self.agent and st.session_state.agent_healthy)
         st.success("✅ Health Check: Service is healthy")
-        st.json(health_data)
+        st.json(_health_payload(healthy))
     
     def _render_main_content(self):
         """Render main application content"""
@@ -124,40 +157,36 @@ class LinkedInPostGeneratorApp:
             status_text = st.empty()
             
             try:
-                # Step 1: Trend Analysis
-                status_text.text("Step 1/8: Analyzing current trends and discussions...")
-                progress_bar.progress(12)
-                
-                # Step 2: Content Inspiration
-                status_text.text("Step 2/8: Researching successful content patterns...")
-                progress_bar.progress(25)
+                # Generate posts, previewing drafts as they stream in and each
+                # finished post as soon as it has passed quality control
+                drafts_area = st.container()
+                draft_slots = []
                 
-                # Step 3: Audience Analysis
-                status_text.text("Step 3/8: Understanding audience interests...")
-                progress_bar.progress(37)
+                def show_preview(index, text):
+                    while len(draft_slots) <= index:
+                        draft_slots.append(drafts_area.empty())
+                    draft_slots[index].markdown(text)
                 
-                # Step 4: Strategic Planning
-                status_text.text("Step 4/8: Creating strategic content plan...")
-                progress_bar.progress(50)
+                def show_drafts(drafts):
+                    for index, draft in enumerate(drafts):
+                        show_preview(index, draft)
                 
-                # Step 5: Content Generation
-                status_text.text("Step 5/8: Generating optimized post content...")
-                progress_bar.progress(62)
+                def show_post(index, post):
+                    show_preview(index, post.content)
                 
-                # Step 6: Quality Control
-                status_text.text("Step 6/8: Quality control and content filtering...")
-                progress_bar.progress(75)
+                def show_progress(percent, message):
+                    progress_bar.progress(percent)
+                    status_text.text(message)
                 
-                # Step 7: Hashtag Generation
-                status_text.text("Step 7/8: Generating relevant hashtags...")
-                progress_bar.progress(87)
+                posts, metadata = self.agent.generate_posts(
+                    post_request, 
+                    draft_cb=show_drafts, 
+                    progress_cb=show_progress, 
+                    post_cb=show_post
+                )
                 
-                # Generate posts
-                posts, metadata = self.agent.generate_posts(post_request)
-                
-                # Step 8: Finalization
-                status_text.text("Step 8/8: Finalizing posts and analysis...")
-                progress_bar.progress(100)
+                for slot in draft_slots:
+                    slot.empty()
                 
                 # Clear progress indicators
                 progress_bar.empty()
@@ -215,12 +244,7 @@ class LinkedInPostGeneratorApp:
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            st.markdown("**AI Agent Features:**")
-            st.markdown("- Multi-step content planning")
-            st.markdown("- Trend analysis and research")
-            st.markdown("- Content inspiration discovery")
-            st.markdown("- Quality control & filtering")
-            st.markdown("- Smart hashtag generation")
+            st.markdown(_footer_features_md())
         
         with col2:
             st.markdown("**Session Stats:**")
@@ -242,6 +266,14 @@ class LinkedInPostGeneratorApp:
 
 def main():
     """Application entry point"""
+    # Page config must precede every other Streamlit call, including agent start-up messages
+    st.set_page_config(
+        page_title=Config.APP_TITLE,
+        page_icon=Config.APP_ICON,
+        layout="centered",
+        initial_sidebar_state="expanded"
+    )
+    
     try:
         app = LinkedInPostGeneratorApp()
         app.run()
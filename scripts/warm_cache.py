@@ -0,0 +1,86 @@
+"""
+Cache warming script for LinkedIn Post Generator
+
+Precomputes trend research and content strategy for popular topics into the persistent
+response cache (Config.RESPONSE_CACHE_PATH), so the first users asking for them skip the
+research calls. Run it at deploy or container start, or periodically from cron:
+
+    python -m scripts.warm_cache                   # Config.POPULAR_TOPICS
+    python -m scripts.warm_cache "Topic A" "Topic B" --concurrency 3
+"""
+from typing import Iterable
+import argparse
+import asyncio
+import logging
+import sys
+from src.config import Config
+from src.utils.gemini_client import GeminiClient
+from src.utils.trend_analyzer import TrendAnalyzer
+
+logger = logging.getLogger(__name__)
+
+async def warm_topics(analyzer: TrendAnalyzer, topics: Iterable[str],
+                      concurrency: int = Config.WARM_CACHE_CONCURRENCY) -> int:
+    """
+    Run the research pipeline for each topic, a few topics at a time
+
+    Prompts are built exactly as the agent builds them for a request with only a topic,
+    so the cached responses are hit by those requests.
+
+    Args:
+        analyzer: TrendAnalyzer whose client writes to the persistent cache
+        topics: Topics to warm
+        concurrency: Maximum topics researched at the same time
+
+    Returns:
+        Number of topics whose research succeeded
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def warm(topic: str) -> bool:
+        async with semaphore:
+            research = await analyzer.analyze_all_async(topic)
+            if research["status"] != "success":
+                logger.warning("Could not warm %r: %s", topic, research.get("message"))
+                return False
+            await analyzer.generate_content_strategy_async(
+                topic, research["trends"], research["inspiration"], research["audience_insights"]
+            )
+            logger.info("Warmed %r", topic)
+            return True
+
+    # Trimmed like LinkedInPostAgent._bound_request so the prompts match
+    bounded = dict.fromkeys(topic.strip()[:Config.MAX_TOPIC_CHARS] for topic in topics)
+    results = await asyncio.gather(*(warm(topic) for topic in bounded if topic))
+    logger.info("Warmed %d of %d topics", sum(results), len(results))
+    return sum(results)
+
+def main() -> int:
+    """Warm the cache for the given or configured topics"""
+    parser = argparse.ArgumentParser(description="Precompute research for popular topics")
+    parser.add_argument("topics", nargs="*", help="Topics to warm (default: Config.POPULAR_TOPICS)")
+    parser.add_argument("--concurrency", type=int, default=Config.WARM_CACHE_CONCURRENCY,
+                        help="Topics researched at the same time")
+    args = parser.parse_args()
+
+    if not Config.RESPONSE_CACHE_PATH:
+        logger.error("RESPONSE_CACHE_PATH is empty, so warmed responses would not be persisted")
+        return 1
+
+    try:
+        gemini_client = GeminiClient()
+    except Exception as e:
+        logger.error("Could not initialize Gemini client: %s", e)
+        return 1
+
+    topics = args.topics or Config.POPULAR_TOPICS
+    try:
+        analyzer = TrendAnalyzer(gemini_client, cache_ttl=Config.WARM_CACHE_TTL)
+        warmed = asyncio.run(warm_topics(analyzer, topics, max(1, args.concurrency)))
+    finally:
+        gemini_client.close()
+
+    return 0 if warmed else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
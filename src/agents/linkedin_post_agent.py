@@ -2,19 +2,175 @@
 Main LinkedIn Post Generation Agent
 Enhanced with trend analysis and content inspiration for better agentic behavior
 """
-from typing import List, Dict, Optional, Tuple
+from typing import TYPE_CHECKING, Callable, List, Dict, Optional, Tuple
+import asyncio
+import json
+import logging
+import re
 import time
-from dataclasses import dataclass
-from src.utils.gemini_client import GeminiClient
-from src.utils.content_filter import ContentFilter
-from src.utils.hashtag_generator import HashtagGenerator
-from src.utils.trend_analyzer import TrendAnalyzer
-from src.utils.cost_estimator import CostEstimator
+from collections import Counter
+from dataclasses import dataclass, replace
+from src.utils.llm_cache import LLMCache, cached_llm_call, load_local_embedder
 from src.config import Config
 
-@dataclass
+if TYPE_CHECKING:
+    from src.utils.cost_estimator import CostEstimator
+
+logger = logging.getLogger(__name__)
+
+# Matches a "Post N:" header at the start of a line (optionally bolded) and captures
+# everything up to the next header or the end of the response
+_POST_RE = re.compile(
+    r'^[#*_ \t]*Post\s*\d+\s*:[*_]*[ \t]*(.*?)(?=^[#*_ \t]*Post\s*\d+\s*:|\Z)',
+    re.MULTILINE | re.DOTALL
+)
+
+# Placeholder notes like "[Content focused on trending angle #1]" the model sometimes echoes back
+_META_RE = re.compile(r'\[Content focused on[^\]]*\]')
+
+# Selectable tones (without the empty "auto" option), paired with their lowercase forms for matching
+_TONE_OPTIONS = Config.TONE_OPTIONS[1:]
+_TONE_OPTIONS_LOWER = tuple(tone.lower() for tone in _TONE_OPTIONS)
+
+# Quality metrics the generation prompt scores each post on, matching ContentFilter.check_post_quality
+_QUALITY_METRICS = ("engagement", "tone", "clarity", "value", "cta")
+
+# Structured output for step 5: posts with their quality metrics plus one shared hashtag list.
+# "content" comes first so post text streams before the scores
+_POSTS_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "posts": {
+            "type": "ARRAY",
+            "items": {
+                "type": "OBJECT",
+                "properties": {
+                    "content": {"type": "STRING"},
+                    "quality": {
+                        "type": "OBJECT",
+                        "properties": {metric: {"type": "INTEGER"} for metric in _QUALITY_METRICS},
+                        "required": list(_QUALITY_METRICS)
+                    }
+                },
+                "required": ["content", "quality"],
+                "property_ordering": ["content", "quality"]
+            }
+        },
+        "hashtags": {"type": "ARRAY", "items": {"type": "STRING"}}
+    },
+    "required": ["posts", "hashtags"],
+    "property_ordering": ["posts", "hashtags"]
+}
+
+# Captures the (possibly unterminated) "content" strings of a streaming JSON response
+_CONTENT_RE = re.compile(r'"content"\s*:\s*"((?:[^"\\]|\\.)*)', re.DOTALL)
+
+# Step 4 prompt; optional request details are passed in as whole lines
+_CONTENT_PLAN_PROMPT = """Based on this comprehensive research and strategy:
+
+CONTENT STRATEGY:
+{strategy}
+
+Create a detailed content plan for {post_count} LinkedIn posts about "{topic}".
+
+Requirements:
+- Leverage trending topics and current discussions
+- Use proven engagement patterns from successful content
+- Address specific audience interests and pain points
+- Ensure each post has a unique angle and value proposition
+- Plan for variety in content types and approaches
+{tone_line}
+{audience_line}
+{post_type_line}
+
+Provide a strategic outline with:
+1. Main angle/hook for each post
+2. Key value proposition
+3. Engagement strategy
+4. Target outcome (shares, comments, etc.)"""
+
+# Step 5 prompt, asking for the structured output described by _POSTS_SCHEMA
+_GEN_POSTS_PROMPT = """Based on this strategic content plan and research:
+
+CONTENT STRATEGY:
+{content_strategy}
+
+CURRENT TRENDS:
+{trends}
+
+SUCCESSFUL CONTENT PATTERNS:
+{inspiration}
+
+Generate {post_count} professional LinkedIn posts about "{topic}".
+
+ENHANCED REQUIREMENTS:
+1. HOOKS: Start each post with a compelling hook based on successful patterns
+   - Use trending angles and current discussions
+   - Address real professional challenges
+   - Create curiosity or emotional connection
+
+2. VALUE DELIVERY: Provide genuine professional value
+   - Actionable insights professionals can use immediately
+   - Real-world examples and case studies
+   - Industry-specific knowledge and expertise
+   - Personal experiences that teach lessons
+
+3. ENGAGEMENT OPTIMIZATION: Structure for maximum engagement
+   - Use proven content formats that drive comments
+   - Include thought-provoking questions
+   - Create shareable moments and quotable insights
+   - End with clear, compelling calls-to-action
+
+4. PROFESSIONAL TONE: 
+   - Use tone: {tone}
+   - Maintain professional credibility
+   - Use industry-appropriate language
+   - Balance authenticity with expertise
+
+5. CONTENT STRUCTURE:
+   - Opening hook (1-2 lines)
+   - Value delivery (main content)
+   - Personal insight or example
+   - Clear call-to-action
+   - Optimal length: {min_len}-{max_len} characters
+
+6. AUDIENCE TARGETING:
+   {audience_line}
+   - Use language and examples they relate to
+   - Address their specific challenges and goals
+
+7. QUALITY SELF-ASSESSMENT: Honestly rate each post from 1 to 10 for
+   - engagement: engagement potential
+   - tone: professional tone
+   - clarity: clarity and readability
+   - value: value to readers
+   - cta: call-to-action effectiveness
+
+8. HASHTAGS: Suggest 5 relevant, popular LinkedIn hashtags shared by all posts
+
+Ensure the posts feel authentic, valuable, and engaging, with variety and unique value in each.
+Respond with JSON containing "posts" (each with "content" and "quality") and "hashtags"."""
+
+# Used to rewrite posts rejected by the content filter, with the rejection reason as guidance
+_REGEN_PROMPT = """Rewrite the LinkedIn post below so that it meets professional LinkedIn standards.
+
+Requirements:
+- Fix the issue described in the rejection reason
+- Keep the topic, core message and overall structure
+- Keep a clear call-to-action
+- Optimal length: {min_len}-{max_len} characters
+- Return only the rewritten post text, with no commentary
+
+Target tone: {tone}
+Topic: {topic}
+Rejection reason: {reason}
+
+Original post:
+{post}"""
+
+@dataclass(slots=True, frozen=True)
 class PostRequest:
-    """Data class for post generation request"""
+    """Data class for post generation request (immutable, so it is hashable)"""
     topic: str
     tone: str = ""
     audience: str = ""
@@ -24,6 +180,14 @@ class PostRequest:
     include_cta: bool = True
 
 @dataclass
+class PostDrafts:
+    """Data class for the output of the fused generation step"""
+    posts: List[str]
+    metrics: Dict[str, Dict[str, int]]  # post content -> quality metrics scored at generation time
+    hashtags: List[str]
+    tone: str
+
+@dataclass(slots=True)
 class GeneratedPost:
     """Data class for a generated post"""
     content: str
@@ -48,63 +212,100 @@ class LinkedInPostAgent:
     8. Final Assembly
     """
     
-    def __init__(self):
+    def __init__(self, client=None):
+        """
+        Args:
+            client: Optional shared genai.Client; a new one is created if omitted
+        """
+        # Imported here so that importing this module (e.g. for PostRequest) doesn't load the Gemini SDK
+        from src.utils.gemini_client import GeminiClient
+        from src.utils.content_filter import ContentFilter
+        from src.utils.hashtag_generator import HashtagGenerator
+        from src.utils.trend_analyzer import TrendAnalyzer
+        from src.utils.cost_estimator import CostEstimator
+        
         self.cost_estimator = CostEstimator()
-        self.gemini_client = GeminiClient()
+        self.gemini_client = GeminiClient(client)
         self.gemini_client.set_cost_tracker(self.cost_estimator)  # Inject cost tracker
         
         self.content_filter = ContentFilter(self.gemini_client)
         self.hashtag_generator = HashtagGenerator(self.gemini_client)
         self.trend_analyzer = TrendAnalyzer(self.gemini_client)
+        embedder = (load_local_embedder() or self.gemini_client.embed_content) if Config.ENABLE_SEMANTIC_CACHE else None
+        self.llm_cache = LLMCache(embedder)
+        
+        # Feature flags are fixed for the process, so disabled research steps are bound to no-ops once
+        if not Config.ENABLE_TREND_ANALYSIS:
+            self._analyze_trends = lambda request: {"status": "disabled"}
+            self._analyze_audience_interests = lambda request: {"status": "skipped", "message": "No audience specified"}
+        if not Config.ENABLE_INSPIRATION_SEARCH:
+            self._research_content_inspiration = lambda request: {"status": "disabled"}
         self.generation_stats = {
             "total_generated": 0,
             "total_filtered": 0,
+            "total_calls": 0,
             "avg_generation_time": 0
         }
     
-    def generate_posts(self, request: PostRequest) -> Tuple[List[GeneratedPost], Dict]:
+    def generate_posts(self, request: PostRequest, draft_cb: Optional[Callable[[List[str]], None]] = None, 
+                       progress_cb: Optional[Callable[[int, str], None]] = None, 
+                       post_cb: Optional[Callable[[int, GeneratedPost], None]] = None) -> Tuple[List[GeneratedPost], Dict]:
         """
         Enhanced method to generate LinkedIn posts using advanced multi-step agent approach
         
         Args:
             request: PostRequest with generation parameters
+            draft_cb: Optional callback receiving the draft posts while they stream in
+            progress_cb: Optional callback receiving (percent, message) at each stage boundary
+            post_cb: Optional callback receiving (index, post) as soon as each final post is ready
+            
+        Returns:
+            Tuple of (list of generated posts, generation metadata)
+        """
+        return asyncio.run(self.generate_posts_async(request, draft_cb, progress_cb, post_cb))
+    
+    async def generate_posts_async(self, request: PostRequest, draft_cb: Optional[Callable[[List[str]], None]] = None, 
+                                   progress_cb: Optional[Callable[[int, str], None]] = None, 
+                                   post_cb: Optional[Callable[[int, GeneratedPost], None]] = None) -> Tuple[List[GeneratedPost], Dict]:
+        """
+        Async implementation of generate_posts that overlaps independent Gemini calls
+        
+        Args:
+            request: PostRequest with generation parameters
+            draft_cb: Optional callback receiving the draft posts while they stream in
+            progress_cb: Optional callback receiving (percent, message) at each stage boundary
+            post_cb: Optional callback receiving (index, post) as soon as each final post is ready
             
         Returns:
             Tuple of (list of generated posts, generation metadata)
         """
         start_time = time.time()
+        request = self._bound_request(request)
         
         try:
-            # Step 1: Trend Analysis (Enhanced Agentic Behavior)
-            trends = self._analyze_trends(request)
-            
-            # Step 2: Content Inspiration Research (Enhanced Agentic Behavior)
-            inspiration = self._research_content_inspiration(request)
-            
-            # Step 3: Audience Interest Analysis (Enhanced Agentic Behavior)
-            audience_insights = self._analyze_audience_interests(request)
+            # Steps 1-3: Trend Analysis, Content Inspiration Research and Audience Interest
+            # Analysis (Enhanced Agentic Behavior) only depend on the request, so run them together
+            self._report_progress(progress_cb, 12, "Steps 1-3/8: Analyzing trends, content patterns and audience interests...")
+            trends, inspiration, audience_insights = await self._research_async(request)
             
             # Step 4: Strategic Content Planning
-            content_strategy = self._create_enhanced_content_plan(request, trends, inspiration, audience_insights)
+            self._report_progress(progress_cb, 50, "Step 4/8: Creating strategic content plan...")
+            content_strategy = await self._create_enhanced_content_plan(request, trends, inspiration, audience_insights)
             
             # Step 5: Generate raw posts with enhanced context
-            raw_posts = self._generate_enhanced_posts(request, content_strategy, trends, inspiration)
-            
-            # Step 6: Filter and quality check
-            filtered_posts = self._filter_and_validate_posts(raw_posts)
+            self._report_progress(progress_cb, 62, "Step 5/8: Generating optimized post content...")
+            drafts = await self._generate_enhanced_posts(request, content_strategy, trends, inspiration, draft_cb)
             
-            # Step 7: Generate hashtags if requested
-            if request.include_hashtags:
-                hashtags = self.hashtag_generator.generate_hashtags(
-                    request.topic, 
-                    request.audience, 
-                    request.post_type
-                )
-            else:
-                hashtags = []
+            # Steps 6 & 7: Filter posts and generate hashtags concurrently (independent calls)
+            self._report_progress(progress_cb, 75, "Steps 6-7/8: Quality control, content filtering and hashtag generation...")
+            filtered_posts, hashtags = await asyncio.gather(
+                self._filter_and_validate_posts(drafts.posts, request, drafts.metrics),
+                self._generate_hashtags(request, drafts.hashtags)
+            )
             
             # Step 8: Assemble final posts with enhanced metadata
-            final_posts = self._assemble_enhanced_final_posts(filtered_posts, hashtags, request, inspiration)
+            self._report_progress(progress_cb, 87, "Step 8/8: Finalizing posts and analysis...")
+            final_posts = await self._assemble_enhanced_final_posts(filtered_posts, hashtags, request, drafts, post_cb)
             
             # Generate metadata
             generation_time = time.time() - start_time
@@ -118,145 +319,213 @@ class LinkedInPostAgent:
         except Exception as e:
             return [], {"error": str(e), "generation_time": time.time() - start_time}
     
+    @staticmethod
+    def _bound_request(request: PostRequest) -> PostRequest:
+        """Trim user text once so oversized input can't multiply across every prompt"""
+        return replace(
+            request,
+            topic=request.topic.strip()[:Config.MAX_TOPIC_CHARS],
+            audience=(request.audience or "").strip()[:Config.MAX_AUDIENCE_CHARS]
+        )
+    
+    @staticmethod
+    def _report_progress(progress_cb: Optional[Callable[[int, str], None]], percent: int, message: str):
+        """Forward a real stage boundary to the caller's progress callback, if any"""
+        if progress_cb:
+            progress_cb(percent, message)
+    
+    @cached_llm_call(
+        "trends", Config.RESEARCH_CACHE_TTL,
+        key=lambda request: request.topic,
+        scope=lambda request: request.audience
+    )
     def _analyze_trends(self, request: PostRequest) -> Dict:
         """Step 1: Analyze current trends (Enhanced Agentic Behavior)"""
-        if Config.ENABLE_TREND_ANALYSIS:
-            return self.trend_analyzer.analyze_current_trends(request.topic, request.audience)
-        return {"status": "disabled"}
+        return self.trend_analyzer.analyze_current_trends(request.topic, request.audience)
     
+    @cached_llm_call(
+        "inspiration", Config.RESEARCH_CACHE_TTL,
+        key=lambda request: request.topic,
+        scope=lambda request: f"{request.tone}\n{request.post_type}"
+    )
     def _research_content_inspiration(self, request: PostRequest) -> Dict:
         """Step 2: Research successful content patterns (Enhanced Agentic Behavior)"""
-        if Config.ENABLE_INSPIRATION_SEARCH:
-            return self.trend_analyzer.find_content_inspiration(request.topic, request.tone, request.post_type)
-        return {"status": "disabled"}
+        return self.trend_analyzer.find_content_inspiration(request.topic, request.tone, request.post_type)
     
+    @cached_llm_call(
+        "audience", Config.RESEARCH_CACHE_TTL,
+        key=lambda request: request.topic if request.audience else None,
+        scope=lambda request: request.audience
+    )
     def _analyze_audience_interests(self, request: PostRequest) -> Dict:
         """Step 3: Analyze target audience interests (Enhanced Agentic Behavior)"""
-        if request.audience and Config.ENABLE_TREND_ANALYSIS:
+        if request.audience:
             return self.trend_analyzer.analyze_audience_interests(request.audience, request.topic)
         return {"status": "skipped", "message": "No audience specified"}
     
-    def _create_enhanced_content_plan(self, request: PostRequest, trends: Dict, inspiration: Dict, audience_insights: Dict) -> str:
+    @cached_llm_call(
+        "research", Config.RESEARCH_CACHE_TTL,
+        key=lambda request: request.topic,
+        scope=lambda request: f"{request.audience}\n{request.tone}\n{request.post_type}"
+    )
+    def _research_combined(self, request: PostRequest) -> Dict:
+        """Steps 1-3 in a single Gemini call"""
+        return self.trend_analyzer.analyze_all(request.topic, request.audience, request.tone, request.post_type)
+    
+    async def _research_async(self, request: PostRequest) -> Tuple[Dict, Dict, Dict]:
+        """Steps 1-3: one combined research call, falling back to the three concurrent calls"""
+        if Config.ENABLE_TREND_ANALYSIS and Config.ENABLE_INSPIRATION_SEARCH:
+            research = await asyncio.to_thread(self._research_combined, request)
+            if research["status"] == "success":
+                return research["trends"], research["inspiration"], research["audience_insights"]
+            logger.warning("Combined research failed, running steps separately: %s", research.get("message"))
+        
+        return await asyncio.gather(
+            self._analyze_trends_async(request),
+            self._research_content_inspiration_async(request),
+            self._analyze_audience_interests_async(request)
+        )
+    
+    async def _analyze_trends_async(self, request: PostRequest) -> Dict:
+        """Async variant of _analyze_trends for the concurrent research phase"""
+        return await asyncio.to_thread(self._analyze_trends, request)
+    
+    async def _research_content_inspiration_async(self, request: PostRequest) -> Dict:
+        """Async variant of _research_content_inspiration for the concurrent research phase"""
+        return await asyncio.to_thread(self._research_content_inspiration, request)
+    
+    async def _analyze_audience_interests_async(self, request: PostRequest) -> Dict:
+        """Async variant of _analyze_audience_interests for the concurrent research phase"""
+        return await asyncio.to_thread(self._analyze_audience_interests, request)
+    
+    async def _create_enhanced_content_plan(self, request: PostRequest, trends: Dict, inspiration: Dict, audience_insights: Dict) -> str:
         """Step 4: Create enhanced strategic content plan"""
-        # Generate comprehensive strategy based on all research
-        strategy = self.trend_analyzer.generate_content_strategy(
+        # Generate comprehensive strategy based on all research; both calls run in worker
+        # threads so the event loop stays free for callbacks
+        strategy = await self.trend_analyzer.generate_content_strategy_async(
             request.topic, trends, inspiration, audience_insights
         )
         
         # Create detailed content plan
-        prompt = f"""Based on this comprehensive research and strategy:
-
-CONTENT STRATEGY:
-{strategy}
-
-Create a detailed content plan for {request.post_count} LinkedIn posts about "{request.topic}".
-
-Requirements:
-- Leverage trending topics and current discussions
-- Use proven engagement patterns from successful content
-- Address specific audience interests and pain points
-- Ensure each post has a unique angle and value proposition
-- Plan for variety in content types and approaches
-{f'- Target tone: {request.tone}' if request.tone else '- Determine most effective tone for each post'}
-{f'- Audience focus: {request.audience}' if request.audience else ''}
-{f'- Post type preference: {request.post_type}' if request.post_type else ''}
-
-Provide a strategic outline with:
-1. Main angle/hook for each post
-2. Key value proposition
-3. Engagement strategy
-4. Target outcome (shares, comments, etc.)"""
+        prompt = _CONTENT_PLAN_PROMPT.format_map({
+            "strategy": strategy,
+            "post_count": request.post_count,
+            "topic": request.topic,
+            "tone_line": f"- Target tone: {request.tone}" if request.tone else "- Determine most effective tone for each post",
+            "audience_line": f"- Audience focus: {request.audience}" if request.audience else "",
+            "post_type_line": f"- Post type preference: {request.post_type}" if request.post_type else ""
+        })
         
-        return self.gemini_client.generate_content(prompt) or strategy
+        return await self.gemini_client.generate_content_async(prompt) or strategy
     
-    def _generate_enhanced_posts(self, request: PostRequest, content_strategy: str, trends: Dict, inspiration: Dict) -> List[str]:
-        """Step 5: Generate enhanced posts with trend and inspiration context"""
-        # Determine effective tone if not specified
-        effective_tone = self._determine_effective_tone(request, trends, inspiration)
+    async def _generate_enhanced_posts(self, request: PostRequest, content_strategy: str, trends: Dict, inspiration: Dict, 
+                                      draft_cb: Optional[Callable[[List[str]], None]] = None) -> PostDrafts:
+        """
+        Step 5: Generate enhanced posts with trend and inspiration context, streaming drafts to draft_cb
         
-        prompt = f"""Based on this strategic content plan and research:
-
-CONTENT STRATEGY:
-{content_strategy}
-
-CURRENT TRENDS:
-{trends.get('trends', 'No trend data available')}
-
-SUCCESSFUL CONTENT PATTERNS:
-{inspiration.get('inspiration', 'No inspiration data available')}
-
-Generate {request.post_count} professional LinkedIn posts about "{request.topic}".
-
-ENHANCED REQUIREMENTS:
-1. HOOKS: Start each post with a compelling hook based on successful patterns
-   - Use trending angles and current discussions
-   - Address real professional challenges
-   - Create curiosity or emotional connection
-
-2. VALUE DELIVERY: Provide genuine professional value
-   - Actionable insights professionals can use immediately
-   - Real-world examples and case studies
-   - Industry-specific knowledge and expertise
-   - Personal experiences that teach lessons
-
-3. ENGAGEMENT OPTIMIZATION: Structure for maximum engagement
-   - Use proven content formats that drive comments
-   - Include thought-provoking questions
-   - Create shareable moments and quotable insights
-   - End with clear, compelling calls-to-action
-
-4. PROFESSIONAL TONE: 
-   - Use tone: {effective_tone}
-   - Maintain professional credibility
-   - Use industry-appropriate language
-   - Balance authenticity with expertise
-
-5. CONTENT STRUCTURE:
-   - Opening hook (1-2 lines)
-   - Value delivery (main content)
-   - Personal insight or example
-   - Clear call-to-action
-   - Optimal length: {Config.MIN_POST_LENGTH}-{Config.MAX_POST_LENGTH} characters
-
-6. AUDIENCE TARGETING:
-   {f'- Speak directly to {request.audience}' if request.audience else '- Address general professional audience'}
-   - Use language and examples they relate to
-   - Address their specific challenges and goals
-
-Format each post clearly and ensure they feel authentic, valuable, and engaging.
-
-Post 1:
-[Content focused on trending angle #1]
-
-Post 2:
-[Content focused on different successful pattern]
-
-Continue for all {request.post_count} posts, ensuring variety and unique value in each."""
+        A single structured call also scores each post and suggests hashtags, so steps 7 and 8
+        only need extra calls for posts rewritten by the filter or when no hashtags came back.
+        """
+        # Determine effective tone if not specified; a cache miss is a blocking Gemini call,
+        # so it runs in a worker thread like the other steps
+        effective_tone = await asyncio.to_thread(self._determine_effective_tone, request, trends, inspiration)
+        
+        prompt = _GEN_POSTS_PROMPT.format_map({
+            "content_strategy": content_strategy,
+            "trends": trends.get('trends', 'No trend data available'),
+            "inspiration": inspiration.get('inspiration', 'No inspiration data available'),
+            "post_count": request.post_count,
+            "topic": request.topic,
+            "tone": effective_tone,
+            "min_len": Config.MIN_POST_LENGTH,
+            "max_len": Config.MAX_POST_LENGTH,
+            "audience_line": f"- Speak directly to {request.audience}" if request.audience else "- Address general professional audience"
+        })
+        
+        response = ""
+        async for chunk in self.gemini_client.generate_content_stream_async(prompt, response_schema=_POSTS_SCHEMA):
+            response += chunk
+            if draft_cb:
+                drafts = [draft for draft in self._stream_draft_contents(response) if draft]
+                if drafts:
+                    draft_cb(drafts)
         
-        response = self.gemini_client.generate_content(prompt)
         if not response:
-            return []
+            return PostDrafts([], {}, [], effective_tone)
         
-        # Parse posts with better extraction
-        posts = []
-        sections = response.split('Post ')
-        for section in sections[1:]:
-            lines = section.strip().split('\n')
-            if len(lines) > 1:
-                # Extract content after the post number
-                post_content = '\n'.join(lines[1:]).strip()
-                # Remove any metadata or formatting
-                post_content = post_content.replace('[Content focused on', '').replace(']', '').strip()
-                if post_content and len(post_content) > 50:
-                    posts.append(post_content)
-        
-        return posts
+        return self._parse_structured_posts(response, effective_tone)
+    
+    def _parse_structured_posts(self, response: str, effective_tone: str) -> PostDrafts:
+        """Parse the JSON generation response, falling back to the 'Post N:' text format"""
+        try:
+            data = self.gemini_client.parse_json(response)
+            items = data["posts"]
+            hashtags = data.get("hashtags") or []
+        except (ValueError, KeyError, TypeError):
+            return PostDrafts(self._parse_posts(response), {}, [], effective_tone)
+        
+        posts, metrics = [], {}
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            post_content = str(item.get("content") or "").strip()
+            if len(post_content) <= 50:
+                continue
+            posts.append(post_content)
+            quality = item.get("quality")
+            if isinstance(quality, dict):
+                scores = {
+                    metric: int(quality[metric]) for metric in _QUALITY_METRICS
+                    if isinstance(quality.get(metric), (int, float))
+                }
+                if scores:
+                    metrics[post_content] = scores
+        
+        return PostDrafts(posts, metrics, hashtags if isinstance(hashtags, list) else [], effective_tone)
+    
+    def _stream_draft_contents(self, response: str) -> List[str]:
+        """Extract post contents from a partial JSON response, or a 'Post N:' one if the model ignored the schema"""
+        matches = _CONTENT_RE.findall(response)
+        if not matches:
+            return self._split_post_sections(response)
+        
+        contents = []
+        for raw in matches:
+            # Drop an escape sequence cut off at the chunk boundary before decoding
+            raw = re.sub(r'\\(u[0-9a-fA-F]{0,3})?$', '', raw)
+            try:
+                contents.append(json.loads(f'"{raw}"').strip())
+            except ValueError:
+                contents.append(raw.strip())
+        return contents
+    
+    def _parse_posts(self, response: str) -> List[str]:
+        """Parse posts with better extraction, dropping fragments too short to be a post"""
+        return [
+            post_content for post_content in self._split_post_sections(response)
+            if post_content and len(post_content) > 50
+        ]
+    
+    @staticmethod
+    def _split_post_sections(response: str) -> List[str]:
+        """Split a (possibly still streaming) 'Post N:' response into per-post contents"""
+        # Remove placeholder metadata only, so brackets in the post itself survive
+        return [_META_RE.sub('', match.group(1)).strip() for match in _POST_RE.finditer(response)]
     
     def _determine_effective_tone(self, request: PostRequest, trends: Dict, inspiration: Dict) -> str:
         """Determine the most effective tone if not specified"""
         if request.tone:
             return request.tone
-        
+        # Default fallback applied after the cache, so a failed selection isn't remembered
+        return self._select_tone(request, trends, inspiration) or "Professional"
+    
+    @cached_llm_call(
+        "tone", Config.TONE_CACHE_TTL,
+        key=lambda request, trends, inspiration: None if request.tone else request.topic,
+        scope=lambda request, trends, inspiration: request.audience
+    )
+    def _select_tone(self, request: PostRequest, trends: Dict, inspiration: Dict) -> Optional[str]:
+        """Ask the model for the best tone, or None if it named no known tone"""
         # Use AI to determine best tone based on research
         prompt = f"""Based on this research about "{request.topic}":
 
@@ -265,53 +534,125 @@ INSPIRATION: {inspiration.get('inspiration', 'No data')}
 AUDIENCE: {request.audience or 'General professional audience'}
 
 What tone would be most effective for LinkedIn posts? Choose from:
-{', '.join(Config.TONE_OPTIONS[1:])}
+{', '.join(_TONE_OPTIONS)}
 
 Respond with just the tone name and brief reasoning."""
         
         response = self.gemini_client.generate_content(prompt)
         if response:
             # Extract the tone from the response
-            for tone in Config.TONE_OPTIONS[1:]:
-                if tone.lower() in response.lower():
+            response_lower = response.lower()
+            for tone, tone_lower in zip(_TONE_OPTIONS, _TONE_OPTIONS_LOWER):
+                if tone_lower in response_lower:
                     return tone
         
-        return "Professional"  # Default fallback
+        return None
     
-    def _filter_and_validate_posts(self, raw_posts: List[str]) -> List[str]:
-        """Step 6: Filter content and validate quality"""
-        filtered_posts = []
+    async def _filter_and_validate_posts(self, raw_posts: List[str], request: PostRequest, metrics: Dict[str, Dict[str, int]]) -> List[str]:
+        """Step 6: Filter content, rewrite rejected posts and validate quality"""
+        # Length validation first, so posts too short to keep never cost a filter call
+        min_len = Config.MIN_ACCEPTED_POST_LENGTH
+        posts = [post for post in raw_posts if len(post) >= min_len]
         
-        for post in raw_posts:
-            # Content safety filter
-            is_safe, filter_result = self.content_filter.filter_content(post)
+        # Content safety filter: every post is checked in a single batched call
+        filter_results = await self._screen_posts(posts, metrics)
+        
+        # Rewrite rejected posts in parallel so the requested post count is still met
+        for _ in range(Config.MAX_REGENERATION_ROUNDS):
+            failed = [
+                (i, filter_result) for i, (is_safe, filter_result) in enumerate(filter_results)
+                if not is_safe and filter_result.startswith('FAIL')
+            ]
+            if not failed:
+                break
+            
+            rewrites = await asyncio.gather(
+                *(self._regenerate_post(posts[i], filter_result, request) for i, filter_result in failed)
+            )
+            replaced = [(i, rewrite) for (i, _), rewrite in zip(failed, rewrites) if rewrite and len(rewrite) >= min_len]
+            if not replaced:
+                break
+            
+            rewrite_results = await self._screen_posts([rewrite for _, rewrite in replaced], metrics)
+            for (i, rewrite), filter_result in zip(replaced, rewrite_results):
+                posts[i] = rewrite
+                filter_results[i] = filter_result
+        
+        filtered_posts = []
+        for post, (is_safe, filter_result) in zip(posts, filter_results):
             if not is_safe:
-                print(f"Post filtered out: {filter_result}")
+                logger.debug("Post filtered out: %s", filter_result)
                 self.generation_stats["total_filtered"] += 1
                 continue
             
-            # Length validation
-            if len(post) < 100:  # Too short
-                continue
-            
             filtered_posts.append(post)
         
         return filtered_posts
     
-    def _assemble_enhanced_final_posts(self, filtered_posts: List[str], hashtags: List[str], request: PostRequest, inspiration: Dict) -> List[GeneratedPost]:
-        """Step 8: Assemble final posts with enhanced metadata"""
-        final_posts = []
-        effective_tone = self._determine_effective_tone(request, {}, inspiration)
+    async def _screen_posts(self, posts: List[str], metrics: Dict[str, Dict[str, int]]) -> List[Tuple[bool, str]]:
+        """
+        Filter posts in one batched call
+        
+        Posts without generation-time scores (unstructured fallback output, rewrites) are filtered
+        and scored by the same call, and their scores are added to metrics so step 8 doesn't
+        need a quality check per post.
+        """
+        if all(post in metrics for post in posts):
+            return await self.content_filter.filter_contents_batch_async(posts)
         
-        for i, post_content in enumerate(filtered_posts):
+        reviews = await self.content_filter.review_posts_batch_async(posts)
+        for post, (_, _, post_metrics) in zip(posts, reviews):
+            if post_metrics:
+                metrics[post] = post_metrics
+        return [(is_safe, filter_result) for is_safe, filter_result, _ in reviews]
+    
+    async def _regenerate_post(self, post: str, reason: str, request: PostRequest) -> Optional[str]:
+        """Rewrite a single rejected post using the filter's reason as guidance"""
+        prompt = _REGEN_PROMPT.format(
+            min_len=Config.MIN_POST_LENGTH,
+            max_len=Config.MAX_POST_LENGTH,
+            tone=request.tone or "Professional",
+            topic=request.topic,
+            reason=reason,
+            post=post
+        )
+        try:
+            return await self.gemini_client.generate_content_async(prompt)
+        except Exception as e:
+            logger.warning("Post regeneration failed: %s", e)
+            return None
+    
+    async def _generate_hashtags(self, request: PostRequest, suggested: List[str]) -> List[str]:
+        """Step 7: Generate hashtags once per request, reusing those suggested at generation time"""
+        if not request.include_hashtags:
+            return []
+        
+        hashtags = self.hashtag_generator.clean_hashtags(suggested)
+        if hashtags:
+            return hashtags
+        
+        return await self.hashtag_generator.generate_hashtags_async(
+            request.topic, 
+            request.audience, 
+            request.post_type
+        )
+    
+    async def _assemble_enhanced_final_posts(self, filtered_posts: List[str], hashtags: List[str], request: PostRequest, drafts: PostDrafts, 
+                                             post_cb: Optional[Callable[[int, GeneratedPost], None]] = None) -> List[GeneratedPost]:
+        """Step 8: Assemble final posts with enhanced metadata, handing each to post_cb as soon as it is ready"""
+        final_posts: List[Optional[GeneratedPost]] = [None] * len(filtered_posts)
+        
+        # Hashtags are shared by every post, so the suffix is joined once
+        hashtag_suffix = f"\n\n{' '.join(hashtags)}" if request.include_hashtags and hashtags else ""
+        
+        async def assemble(index: int, post_content: str):
             # Add hashtags if requested
-            if request.include_hashtags and hashtags:
-                content_with_hashtags = f"{post_content}\n\n{' '.join(hashtags)}"
-            else:
-                content_with_hashtags = post_content
+            content_with_hashtags = post_content + hashtag_suffix
             
-            # Get quality metrics
-            _, feedback, metrics = self.content_filter.check_post_quality(post_content)
+            # Reuse the metrics scored at generation time; rewritten posts need their own check
+            metrics = drafts.metrics.get(post_content)
+            if metrics is None:
+                _, _, metrics = await self.content_filter.check_post_quality_async(post_content)
             
             # Create GeneratedPost object with enhanced metadata
             generated_post = GeneratedPost(
@@ -321,11 +662,16 @@ Respond with just the tone name and brief reasoning."""
                 quality_score=metrics.get('engagement', 0) / 10.0 if metrics else 0.5,
                 engagement_potential=self._calculate_engagement_potential(metrics),
                 generation_time=0.0,  # Will be set in metadata
-                tone_used=effective_tone,
+                tone_used=drafts.tone,
                 inspiration_source="trend analysis and successful content patterns"
             )
             
-            final_posts.append(generated_post)
+            final_posts[index] = generated_post
+            if post_cb:
+                post_cb(index, generated_post)
+        
+        # Remaining quality checks are independent per post, so they run concurrently
+        await asyncio.gather(*(assemble(i, post_content) for i, post_content in enumerate(filtered_posts)))
         
         return final_posts
     
@@ -344,6 +690,13 @@ Respond with just the tone name and brief reasoning."""
     
     def _create_enhanced_metadata(self, posts: List[GeneratedPost], generation_time: float, request: PostRequest, trends: Dict, inspiration: Dict) -> Dict:
         """Create enhanced generation metadata"""
+        # Single pass over the posts for both the character total and the quality buckets
+        total_chars = 0
+        buckets = Counter()
+        for post in posts:
+            total_chars += post.char_count
+            buckets[post.engagement_potential] += 1
+        
         return {
             "generation_time": round(generation_time, 2),
             "posts_generated": len(posts),
@@ -363,11 +716,11 @@ Respond with just the tone name and brief reasoning."""
                 "requested_count": request.post_count,
                 "include_hashtags": request.include_hashtags
             },
-            "avg_char_count": sum(p.char_count for p in posts) // len(posts) if posts else 0,
+            "avg_char_count": total_chars // len(posts) if posts else 0,
             "quality_distribution": {
-                "high": len([p for p in posts if p.engagement_potential == "High"]),
-                "medium": len([p for p in posts if p.engagement_potential == "Medium"]),
-                "low": len([p for p in posts if p.engagement_potential == "Low"])
+                "high": buckets["High"],
+                "medium": buckets["Medium"],
+                "low": buckets["Low"]
             },
             "tone_analysis": {
                 "effective_tone": posts[0].tone_used if posts else "Professional",
@@ -385,13 +738,11 @@ Respond with just the tone name and brief reasoning."""
         """Update generation statistics"""
         self.generation_stats["total_generated"] += posts_generated
         
-        # Update average generation time
-        if self.generation_stats["avg_generation_time"] == 0:
-            self.generation_stats["avg_generation_time"] = generation_time
-        else:
-            self.generation_stats["avg_generation_time"] = (
-                self.generation_stats["avg_generation_time"] + generation_time
-            ) / 2
+        # Update average generation time with an incremental (Welford) mean over all calls
+        n = self.generation_stats["total_calls"] + 1
+        mean = self.generation_stats["avg_generation_time"]
+        self.generation_stats["avg_generation_time"] = mean + (generation_time - mean) / n
+        self.generation_stats["total_calls"] = n
     
     def get_health_status(self) -> Dict:
         """Get agent health status"""
@@ -405,6 +756,10 @@ Respond with just the tone name and brief reasoning."""
             "generation_stats": self.generation_stats
         }
     
-    def get_cost_estimator(self) -> CostEstimator:
+    def close(self):
+        """Release the Gemini client's network resources"""
+        self.gemini_client.close()
+    
+    def get_cost_estimator(self) -> "CostEstimator":
         """Get the cost estimator instance"""
         return self.cost_estimator
@@ -1,17 +1,32 @@
 """
 Configuration module for LinkedIn Post Generator
 """
+import logging
 import os
 from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
+# Load environment variables (set SKIP_DOTENV=1 where the environment is already provided).
+# The marker lets worker processes, which inherit the environment, skip re-parsing .env
+if os.getenv('SKIP_DOTENV') != '1' and not os.getenv('_DOTENV_LOADED'):
+    load_dotenv()
+    os.environ['_DOTENV_LOADED'] = '1'
+
+# Configure application logging once; set LOG_LEVEL=DEBUG to see filtered-out posts
+logging.basicConfig(
+    level=os.getenv('LOG_LEVEL', 'INFO').upper(),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+)
 
 class Config:
     """Application configuration"""
     
     # API Configuration
     GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
+    REQUEST_TIMEOUT_MS = 30000  # Per-request HTTP timeout for Gemini calls
+    HTTP_MAX_CONNECTIONS = 20   # Pooled (and kept-alive) connections to the Gemini API
+    RETRY_BASE_DELAY = 0.5  # Seconds before the first retry, doubled on each attempt
+    RETRY_MAX_DELAY = 8.0   # Upper bound on the backoff delay
+    RETRY_JITTER = 0.25     # Random extra delay added to each backoff
     
     # Model Configuration
     SUPPORTED_MODELS = [
@@ -23,6 +38,20 @@ class Config:
         "models/gemini-pro"         # With models/ prefix
     ]
     
+    # Model Routing: TrendAnalyzer call -> model alias (or full model name); unmapped calls
+    # use the model picked at startup, and a failing routed model falls back to it
+    MODEL_ALIASES = {
+        "flash": "gemini-1.5-flash",
+        "pro": "gemini-1.5-pro",
+    }
+    MODEL_ROUTING = {
+        "trends": "flash",
+        "inspiration": "flash",
+        "audience": "flash",
+        "research": "flash",  # Combined trends/inspiration/audience call
+        "strategy": "pro",
+    }
+    
     # App Configuration
     APP_TITLE = "LinkedIn Post Generator"
     APP_ICON = ""
@@ -30,20 +59,70 @@ class Config:
     MIN_POSTS = 1
     DEFAULT_POSTS = 3
     
+    # Input Limits (user text is embedded in several prompts per generation)
+    MAX_TOPIC_CHARS = 2000
+    MAX_AUDIENCE_CHARS = 200
+    STRATEGY_RESEARCH_TOKEN_BUDGET = 6000  # Research text embedded in the strategy prompt, shared across sections
+    
     # Content Configuration
     MAX_POST_LENGTH = 1300
     MIN_POST_LENGTH = 1000
+    MIN_ACCEPTED_POST_LENGTH = 100  # Shorter posts are dropped before the content filter runs
+    MAX_REGENERATION_ROUNDS = 1  # Rewrite attempts for posts rejected by the content filter
     
     # Tone Options
-    TONE_OPTIONS = ["", "Professional", "Conversational", "Enthusiastic", "Educational", "Inspirational", "Analytical", "Thought Leadership", "Personal Storytelling"]
+    TONE_OPTIONS = ("", "Professional", "Conversational", "Enthusiastic", "Educational", "Inspirational", "Analytical", "Thought Leadership", "Personal Storytelling")
     
     # Post Types
-    POST_TYPES = ["", "Story", "Tips", "Question", "Industry Insight", "Personal Experience", "Tutorial", "Case Study", "Opinion Piece"]
+    POST_TYPES = ("", "Story", "Tips", "Question", "Industry Insight", "Personal Experience", "Tutorial", "Case Study", "Opinion Piece")
     
     # Trend Analysis
     ENABLE_TREND_ANALYSIS = True
     ENABLE_INSPIRATION_SEARCH = True
     
+    # Caching
+    HASHTAG_CACHE_TTL = 3600  # Seconds to reuse hashtags for the same topic/audience
+    HASHTAG_CACHE_SIZE = 256  # Number of hashtag sets kept in memory
+    FILTER_CACHE_SIZE = 256   # Number of content filter verdicts kept in memory
+    HEALTH_CHECK_TTL = 30     # Seconds a successful connection test is reused
+    LLM_CACHE_SIZE = 512      # Research results kept per cache tier
+    RESEARCH_CACHE_TTL = 6 * 3600  # Trend, inspiration and audience research
+    TONE_CACHE_TTL = 24 * 3600     # Tone selection changes slowly
+    ENABLE_SEMANTIC_CACHE = True   # Also reuse results for near-identical requests
+    SEMANTIC_CACHE_THRESHOLD = 0.92  # Minimum cosine similarity for a semantic hit
+    EMBEDDING_MODEL = "gemini-embedding-001"
+    LOCAL_EMBEDDING_MODEL = "all-MiniLM-L6-v2"  # Used instead when sentence-transformers is installed
+    RESPONSE_CACHE_PATH = os.getenv('RESPONSE_CACHE_PATH', '.llm_cache.sqlite3')  # Empty disables persistence
+    RESPONSE_CACHE_MAX_ROWS = 5000     # Rows kept in the persistent cache; the soonest to expire go first
+    RESPONSE_CACHE_PRUNE_EVERY = 100   # Writes between sweeps of expired and surplus rows
+    
+    # Cache Warming (scripts/warm_cache.py): research for these topics is precomputed into
+    # the persistent response cache, for requests without audience, tone or post type
+    POPULAR_TOPICS = (
+        "AI in business transformation",
+        "Remote work and hybrid teams",
+        "Leadership lessons",
+        "Career growth and upskilling",
+        "Personal branding on LinkedIn",
+        "Startup fundraising",
+        "Product management",
+        "Data-driven decision making",
+        "Cybersecurity for businesses",
+        "Sustainability in business",
+        "Customer experience",
+        "Digital marketing trends",
+        "Generative AI tools at work",
+        "Software engineering best practices",
+        "Cloud computing",
+        "Diversity and inclusion in the workplace",
+        "Productivity and time management",
+        "Sales and business development",
+        "Entrepreneurship",
+        "Future of work",
+    )
+    WARM_CACHE_TTL = 30 * 24 * 3600  # Warmed entries outlive regular research entries
+    WARM_CACHE_CONCURRENCY = 5       # Topics researched at the same time
+    
     @classmethod
     def validate_config(cls):
         """Validate configuration"""
@@ -3,24 +3,157 @@ UI components for Streamlit interface - Simplified Copy Version
 """
 import streamlit as st
 from typing import Dict, List
-from datetime import datetime
 from src.agents.linkedin_post_agent import GeneratedPost, PostRequest
 from src.config import Config
 from src.utils.clipboard_helper import ClipboardHelper
 
+# Input form placeholders and help texts
+_PLACEHOLDER_TOPIC = "e.g., cold-start strategies for marketplaces, remote work productivity tips, AI in business transformation"
+_HELP_TOPIC = "Enter the main topic for your LinkedIn posts. Be specific for better results."
+_HELP_TONE = "Select the tone for your posts"
+_HELP_POST_TYPE = "Choose the type/format of posts"
+_HELP_POST_COUNT = "How many posts to generate"
+_PLACEHOLDER_AUDIENCE = "e.g., startup founders, product managers, data scientists"
+_HELP_AUDIENCE = "Specify your target audience for better personalization"
+_HELP_HASHTAGS = "Add relevant hashtags to your posts"
+_HELP_CTA = "Add engaging CTAs to encourage interaction"
+
+# Static sidebar text, built once and reused across reruns
+@st.cache_data(show_spinner=False)
+def _sidebar_about_md() -> str:
+    """About section of the sidebar"""
+    return """
+    This AI-powered tool generates professional LinkedIn posts using advanced content planning, trend analysis, and quality control.
+    
+    **Enhanced Features:**
+    - Multi-step AI agent approach
+    - Current trend analysis
+    - Content inspiration research
+    - Content safety filtering
+    - Quality scoring and optimization
+    - Smart hashtag generation
+    - Cost estimation and tracking
+    """
+
+@st.cache_data(show_spinner=False)
+def _sidebar_copy_md() -> str:
+    """Copy instructions shown in the sidebar"""
+    return """
+    **To copy a post:**
+    1. Click the "📋 Copy to Clipboard" button for instant copy
+    2. Or triple-click in the text area and press Ctrl+C
+    3. Use the download button to save as a file
+    """
+
+@st.cache_data(show_spinner=False)
+def _sidebar_tips_md() -> str:
+    """Tips for better posts shown in the sidebar"""
+    return """
+    - **Be specific** with your topic for better trend analysis
+    - **Define your audience** for targeted content
+    - **Choose appropriate tone** or let AI optimize it
+    - **Review and customize** generated content
+    - **Test different post types** for variety
+    - **Use trending topics** for better reach
+    """
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def _copy_button_html(content: str, button_id: str, button_text: str) -> str:
+    """Copy button markup, which only depends on its arguments (LRU-bounded across posts)"""
+    return ClipboardHelper.create_copy_button_html(
+        content=content,
+        button_id=button_id,
+        button_text=button_text
+    )
+
+@st.fragment
+def _render_single_post(post: GeneratedPost, index: int):
+    """
+    Render a single post with simplified copy functionality
+    
+    Runs as a fragment, so Customize/Save/Cancel rerun only this post
+    instead of the whole page.
+    """
+    content_hash = hash(post.content) % 10000  # Keys widgets to the current content
+    editing_key = f'editing_post_{index}'
+    with st.expander(f"Post {index} - {post.engagement_potential} Engagement Potential - Tone: {post.tone_used}", expanded=True):
+        
+        # Post content
+        st.markdown(post.content)
+        
+        # Post metrics, as one compact line
+        st.caption(
+            f"**{post.char_count}** characters · Quality **{post.quality_score:.1f}/1.0** · "
+            f"{post.engagement_potential} engagement · Tone: {post.tone_used} · "
+            f"{len(post.hashtags)} hashtags"
+        )
+        
+        # Simple copy section
+        st.markdown("---")
+        st.markdown("**📋 Copy this post:**")
+        
+        # Single copy button
+        copy_html = _copy_button_html(post.content, f"post_{index}", "📋 Copy to Clipboard")
+        st.components.v1.html(copy_html, height=60)
+        
+        # Fallback text area, only mounted on request (expanders can't be nested inside the post's expander)
+        if st.toggle("Select manually", key=f"manual_toggle_{index}"):
+            st.text_area(
+                "Or select manually (triple-click to select all):",
+                value=post.content,
+                height=100,
+                key=f"manual_{index}_{content_hash}",
+                help="Triple-click to select all, then Ctrl+C (Windows) or Cmd+C (Mac) to copy"
+            )
+        
+        # Simple download option
+        col_dl, col_edit = st.columns(2)
+        with col_dl:
+            st.download_button(
+                label="💾 Download",
+                data=lambda: post.content,  # Deferred: only materialized when clicked
+                file_name=f"post_{index}.txt",
+                mime="text/plain",
+                key=f"dl_{index}_{content_hash}"
+            )
+        
+        with col_edit:
+            if st.button("Customize", key=f"edit_{index}"):
+                st.session_state[editing_key] = True
+                st.session_state.setdefault('_editing_posts', set()).add(index)
+        
+        # Customization area
+        if st.session_state.get(editing_key, False):
+            with st.container():
+                st.write("**Customize this post:**")
+                edited_content = st.text_area(
+                    "Edit content:",
+                    value=post.content,
+                    height=200,
+                    key=f"edit_content_{index}"
+                )
+                
+                col_save, col_cancel = st.columns(2)
+                with col_save:
+                    if st.button("Save Changes", key=f"save_{index}"):
+                        post.content = edited_content
+                        post.char_count = len(edited_content)
+                        st.session_state[editing_key] = False
+                        st.session_state.get('_editing_posts', set()).discard(index)
+                        st.rerun(scope="fragment")
+                
+                with col_cancel:
+                    if st.button("Cancel", key=f"cancel_{index}"):
+                        st.session_state[editing_key] = False
+                        st.session_state.get('_editing_posts', set()).discard(index)
+                        st.rerun(scope="fragment")
+
 class UIComponents:
     """Reusable UI components for the Streamlit app"""
     
     @staticmethod
     def render_header():
         """Render app header"""
-        st.set_page_config(
-            page_title=Config.APP_TITLE,
-            page_icon=Config.APP_ICON,
-            layout="centered",
-            initial_sidebar_state="expanded"
-        )
-        
         st.title(Config.APP_TITLE)
         st.markdown("Generate engaging LinkedIn posts using AI with advanced content planning, trend analysis, and quality control")
         
@@ -45,9 +178,10 @@ class UIComponents:
             # Required topic input
             topic = st.text_area(
                 "Topic* (required)", 
-                placeholder="e.g., cold-start strategies for marketplaces, remote work productivity tips, AI in business transformation",
-                help="Enter the main topic for your LinkedIn posts. Be specific for better results.",
-                height=100
+                placeholder=_PLACEHOLDER_TOPIC,
+                help=_HELP_TOPIC,
+                height=100,
+                max_chars=Config.MAX_TOPIC_CHARS
             )
             
             # Optional inputs in columns
@@ -57,13 +191,13 @@ class UIComponents:
                 tone = st.selectbox(
                     "Tone",
                     options=Config.TONE_OPTIONS,
-                    help="Select the tone for your posts"
+                    help=_HELP_TONE
                 )
                 
                 post_type = st.selectbox(
                     "Post Type",
                     options=Config.POST_TYPES,
-                    help="Choose the type/format of posts"
+                    help=_HELP_POST_TYPE
                 )
                 
                 post_count = st.slider(
@@ -71,26 +205,27 @@ class UIComponents:
                     min_value=Config.MIN_POSTS,
                     max_value=Config.MAX_POSTS,
                     value=Config.DEFAULT_POSTS,
-                    help="How many posts to generate"
+                    help=_HELP_POST_COUNT
                 )
 
             with col2:
                 audience = st.text_input(
                     "Target Audience",
-                    placeholder="e.g., startup founders, product managers, data scientists",
-                    help="Specify your target audience for better personalization"
+                    placeholder=_PLACEHOLDER_AUDIENCE,
+                    help=_HELP_AUDIENCE,
+                    max_chars=Config.MAX_AUDIENCE_CHARS
                 )
                 
                 include_hashtags = st.checkbox(
                     "Include hashtags",
                     value=True,
-                    help="Add relevant hashtags to your posts"
+                    help=_HELP_HASHTAGS
                 )
                 
                 include_cta = st.checkbox(
                     "Include Call-to-Action",
                     value=True,
-                    help="Add engaging CTAs to encourage interaction"
+                    help=_HELP_CTA
                 )
 
             # Submit button
@@ -133,48 +268,45 @@ class UIComponents:
         
         # Posts
         for i, post in enumerate(posts, 1):
-            UIComponents._render_single_post(post, i)
+            _render_single_post(post, i)
     
     @staticmethod
     def _render_generation_metadata(metadata: Dict):
-        """Render generation metadata in an expander"""
+        """Render generation metadata in an expander, as one table plus the request parameters"""
         with st.expander("Generation Details", expanded=False):
-            col1, col2, col3 = st.columns(3)
-            
-            with col1:
-                st.metric("Generation Time", f"{metadata.get('generation_time', 0):.2f}s")
-                st.metric("Posts Generated", metadata.get('posts_generated', 0))
-            
-            with col2:
-                st.metric("Model Used", metadata.get('model_used', 'N/A'))
-                st.metric("Avg Characters", metadata.get('avg_char_count', 0))
-            
-            with col3:
-                quality_dist = metadata.get('quality_distribution', {})
-                st.write("**Quality Distribution:**")
-                st.write(f"High: {quality_dist.get('high', 0)}")
-                st.write(f"Medium: {quality_dist.get('medium', 0)}")
-                st.write(f"Low: {quality_dist.get('low', 0)}")
+            quality_dist = metadata.get('quality_distribution', {})
+            rows = {
+                "Generation Time": f"{metadata.get('generation_time', 0):.2f}s",
+                "Posts Generated": metadata.get('posts_generated', 0),
+                "Model Used": metadata.get('model_used', 'N/A'),
+                "Avg Characters": metadata.get('avg_char_count', 0),
+                "Quality High": quality_dist.get('high', 0),
+                "Quality Medium": quality_dist.get('medium', 0),
+                "Quality Low": quality_dist.get('low', 0)
+            }
             
             # Enhanced metadata display
             if 'agentic_features_used' in metadata:
-                st.write("**AI Agent Features Used:**")
                 features = metadata['agentic_features_used']
-                feature_list = []
-                if features.get('trend_analysis'): feature_list.append("Trend Analysis")
-                if features.get('content_inspiration'): feature_list.append("Content Inspiration")
-                if features.get('audience_analysis'): feature_list.append("Audience Analysis")
-                if features.get('tone_optimization'): feature_list.append("Tone Optimization")
-                if features.get('quality_filtering'): feature_list.append("Quality Filtering")
-                st.write(", ".join(feature_list))
+                feature_names = {
+                    'trend_analysis': "Trend Analysis",
+                    'content_inspiration': "Content Inspiration",
+                    'audience_analysis': "Audience Analysis",
+                    'tone_optimization': "Tone Optimization",
+                    'quality_filtering': "Quality Filtering"
+                }
+                rows["AI Agent Features Used"] = ", ".join(
+                    name for feature, name in feature_names.items() if features.get(feature)
+                )
             
             # Tone analysis
             if 'tone_analysis' in metadata:
                 tone_info = metadata['tone_analysis']
-                st.write("**Tone Analysis:**")
-                st.write(f"Effective tone used: {tone_info.get('effective_tone', 'N/A')}")
+                rows["Effective Tone"] = tone_info.get('effective_tone', 'N/A')
                 if tone_info.get('tone_optimization'):
-                    st.write("Tone was automatically optimized based on research")
+                    rows["Tone Optimization"] = "Automatically optimized based on research"
+            
+            st.table({"Metric": list(rows.keys()), "Value": [str(value) for value in rows.values()]})
             
             # Request parameters
             if 'request_params' in metadata:
@@ -182,143 +314,25 @@ class UIComponents:
                 params = metadata['request_params']
                 st.json(params)
     
-    @staticmethod
-    def _render_single_post(post: GeneratedPost, index: int):
-        """Render a single post with simplified copy functionality"""
-        with st.expander(f"Post {index} - {post.engagement_potential} Engagement Potential - Tone: {post.tone_used}", expanded=True):
-            
-            # Post content
-            st.markdown(post.content)
-            
-            # Post metrics
-            col1, col2, col3, col4, col5 = st.columns(5)
-            
-            with col1:
-                st.metric("Characters", post.char_count)
-            
-            with col2:
-                st.metric("Quality Score", f"{post.quality_score:.1f}/1.0")
-            
-            with col3:
-                st.metric("Engagement", post.engagement_potential)
-                
-            with col4:
-                st.metric("Tone", post.tone_used)
-            
-            with col5:
-                if post.hashtags:
-                    st.metric("Hashtags", len(post.hashtags))
-            
-            # Simple copy section
-            st.markdown("---")
-            st.markdown("**📋 Copy this post:**")
-            
-            # Single copy button
-            copy_html = ClipboardHelper.create_copy_button_html(
-                content=post.content,
-                button_id=f"post_{index}",
-                button_text="📋 Copy to Clipboard"
-            )
-            st.components.v1.html(copy_html, height=60)
-            
-            # Fallback text area
-            st.text_area(
-                "Or select manually (triple-click to select all):",
-                value=post.content,
-                height=100,
-                key=f"manual_{index}_{hash(post.content) % 10000}",
-                help="Triple-click to select all, then Ctrl+C (Windows) or Cmd+C (Mac) to copy"
-            )
-            
-            # Simple download option
-            col_dl, col_edit = st.columns(2)
-            with col_dl:
-                st.download_button(
-                    label="💾 Download",
-                    data=post.content,
-                    file_name=f"post_{index}.txt",
-                    mime="text/plain",
-                    key=f"dl_{index}_{hash(post.content) % 10000}"
-                )
-            
-            with col_edit:
-                if st.button(f"Customize", key=f"edit_{index}"):
-                    st.session_state[f'editing_post_{index}'] = True
-            
-            # Customization area
-            if st.session_state.get(f'editing_post_{index}', False):
-                with st.container():
-                    st.write("**Customize this post:**")
-                    edited_content = st.text_area(
-                        "Edit content:",
-                        value=post.content,
-                        height=200,
-                        key=f"edit_content_{index}"
-                    )
-                    
-                    col_save, col_cancel = st.columns(2)
-                    with col_save:
-                        if st.button("Save Changes", key=f"save_{index}"):
-                            post.content = edited_content
-                            post.char_count = len(edited_content)
-                            st.session_state[f'editing_post_{index}'] = False
-                            st.rerun()
-                    
-                    with col_cancel:
-                        if st.button("Cancel", key=f"cancel_{index}"):
-                            st.session_state[f'editing_post_{index}'] = False
-                            st.rerun()
-    
     @staticmethod
     def render_sidebar():
         """Render sidebar with additional information and controls"""
         with st.sidebar:
             st.header("About")
-            st.markdown("""
-            This AI-powered tool generates professional LinkedIn posts using advanced content planning, trend analysis, and quality control.
-            
-            **Enhanced Features:**
-            - Multi-step AI agent approach
-            - Current trend analysis
-            - Content inspiration research
-            - Content safety filtering
-            - Quality scoring and optimization
-            - Smart hashtag generation
-            - Cost estimation and tracking
-            """)
+            st.markdown(_sidebar_about_md())
             
             st.header("Copy Instructions")
-            st.markdown("""
-            **To copy a post:**
-            1. Click the "📋 Copy to Clipboard" button for instant copy
-            2. Or triple-click in the text area and press Ctrl+C
-            3. Use the download button to save as a file
-            """)
+            st.markdown(_sidebar_copy_md())
             
             st.header("Tips for Better Posts")
-            st.markdown("""
-            - **Be specific** with your topic for better trend analysis
-            - **Define your audience** for targeted content
-            - **Choose appropriate tone** or let AI optimize it
-            - **Review and customize** generated content
-            - **Test different post types** for variety
-            - **Use trending topics** for better reach
-            """)
+            st.markdown(_sidebar_tips_md())
             
             st.header("Settings")
             if st.button("Reset Session"):
-                for key in list(st.session_state.keys()):
-                    if key.startswith('editing_post_'):
-                        del st.session_state[key]
+                # Only the posts being edited are tracked, so no scan over every session key
+                editing_posts = st.session_state.get('_editing_posts', set())
+                for index in editing_posts:
+                    st.session_state.pop(f'editing_post_{index}', None)
+                editing_posts.clear()
                 st.rerun()
     
-    @staticmethod
-    def render_health_endpoint():
-        """Render health check endpoint"""
-        health_data = {
-            "status": "ok",
-            "timestamp": str(datetime.now()),
-            "app": Config.APP_TITLE,
-            "version": "1.0.0"
-        }
-        st.json(health_data)
@@ -3,9 +3,143 @@ Clipboard and content copying utilities
 """
 
 import streamlit as st
-from typing import List
+from typing import List, Tuple
 from datetime import datetime
+from functools import lru_cache
+import io
 import json
+import re
+
+# Divider between items in the "Download All Separate" file
+_SECTION_SEPARATOR = "\n\n" + "=" * 50 + "\n\n"
+
+# Single-character escapes applied in one pass by str.translate
+_JS_ESCAPE = str.maketrans({
+    '\\': '\\\\',
+    '"': '\\"',
+    "'": "\\'",
+    '\n': '\\n',
+    '\r': '',
+    '\t': '\\t',
+    '`': '\\`',
+})
+
+@lru_cache(maxsize=1024)
+def _escape_for_javascript(text: str) -> str:
+    """Escape text for safe inclusion in JavaScript (cached, posts are re-escaped on every rerun)"""
+    # '${' is escaped after the table so its backslash is not doubled
+    return text.translate(_JS_ESCAPE).replace('${', '\\${')
+
+# Copy button markup, split once at its placeholders so building it is a single join
+_COPY_BUTTON_TEMPLATE = """
+    <div style="margin: 10px 0;">
+        <button 
+            onclick="copyToClipboard_{button_id}()" 
+            style="
+                background-color: #0066cc;
+                color: white;
+                border: none;
+                padding: 10px 20px;
+                border-radius: 6px;
+                cursor: pointer;
+                font-size: 14px;
+                font-weight: bold;
+                box-shadow: 0 2px 4px rgba(0,0,0,0.2);
+                transition: background-color 0.3s;
+            "
+            onmouseover="this.style.backgroundColor='#0052a3'"
+            onmouseout="this.style.backgroundColor='#0066cc'"
+        >
+            {button_text}
+        </button>
+        <span id="copyStatus_{button_id}" style="margin-left: 10px; color: green; font-size: 12px; font-weight: bold;"></span>
+    </div>
+    
+    <script>
+    function copyToClipboard_{button_id}() {
+        const text = "{escaped_content}";
+        
+        if (navigator.clipboard && window.isSecureContext) {
+            // Modern clipboard API
+            navigator.clipboard.writeText(text).then(function() {
+                document.getElementById('copyStatus_{button_id}').innerText = '✅ Copied successfully!';
+                setTimeout(() => {
+                    document.getElementById('copyStatus_{button_id}').innerText = '';
+                }, 3000);
+            }).catch(function(err) {
+                console.error('Could not copy text: ', err);
+                fallbackCopy_{button_id}(text);
+            });
+        } else {
+            fallbackCopy_{button_id}(text);
+        }
+    }
+    
+    function fallbackCopy_{button_id}(text) {
+        // Fallback for older browsers
+        const textArea = document.createElement('textarea');
+        textArea.value = text;
+        textArea.style.position = 'fixed';
+        textArea.style.left = '-999999px';
+        textArea.style.top = '-999999px';
+        document.body.appendChild(textArea);
+        textArea.focus();
+        textArea.select();
+        
+        try {
+            const successful = document.execCommand('copy');
+            if (successful) {
+                document.getElementById('copyStatus_{button_id}').innerText = '✅ Copied successfully!';
+            } else {
+                document.getElementById('copyStatus_{button_id}').innerText = '⚠️ Copy may have failed - check manual method';
+            }
+            setTimeout(() => {
+                document.getElementById('copyStatus_{button_id}').innerText = '';
+            }, 3000);
+        } catch (err) {
+            console.error('Fallback copy failed: ', err);
+            document.getElementById('copyStatus_{button_id}').innerText = '❌ Copy failed - use manual method';
+            setTimeout(() => {
+                document.getElementById('copyStatus_{button_id}').innerText = '';
+            }, 3000);
+        }
+        
+        document.body.removeChild(textArea);
+    }
+    </script>
+    """
+_COPY_BUTTON_PARTS = tuple(re.split(r"\{(button_id|button_text|escaped_content)\}", _COPY_BUTTON_TEMPLATE))
+
+@lru_cache(maxsize=256)
+def _build_copy_button_html(content: str, button_id: str, button_text: str) -> str:
+    """Build the copy button markup (cached, the markup only depends on its arguments)"""
+    values = {
+        "button_id": button_id,
+        "button_text": button_text,
+        "escaped_content": _escape_for_javascript(content),  # Escape content for JavaScript
+    }
+    # Even parts are static markup, odd parts name the value substituted there
+    return "".join(part if i % 2 == 0 else values[part] for i, part in enumerate(_COPY_BUTTON_PARTS))
+
+# Bulk download payloads are only built when a download button is clicked
+@st.cache_data(show_spinner=False, max_entries=16)
+def _bulk_separate_text(labels: Tuple[str, ...], contents: Tuple[str, ...]) -> str:
+    buffer = io.StringIO()
+    for i, (label, content) in enumerate(zip(labels, contents)):
+        if i:
+            buffer.write(_SECTION_SEPARATOR)
+        buffer.write(label.upper())
+        buffer.write(":\n\n")
+        buffer.write(content)
+    return buffer.getvalue()
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _bulk_json_text(labels: Tuple[str, ...], contents: Tuple[str, ...]) -> str:
+    return json.dumps(dict(zip(labels, contents)), indent=2, ensure_ascii=False)
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _bulk_concatenated_text(contents: Tuple[str, ...]) -> str:
+    return "\n\n".join(contents)
 
 class ClipboardHelper:
     """Helper class for clipboard operations and content copying"""
@@ -23,86 +157,7 @@ class ClipboardHelper:
         Returns:
             HTML string with copy functionality
         """
-        # Escape content for JavaScript
-        escaped_content = ClipboardHelper._escape_for_javascript(content)
-        
-        return f"""
-        <div style="margin: 10px 0;">
-            <button 
-                onclick="copyToClipboard_{button_id}()" 
-                style="
-                    background-color: #0066cc;
-                    color: white;
-                    border: none;
-                    padding: 10px 20px;
-                    border-radius: 6px;
-                    cursor: pointer;
-                    font-size: 14px;
-                    font-weight: bold;
-                    box-shadow: 0 2px 4px rgba(0,0,0,0.2);
-                    transition: background-color 0.3s;
-                "
-                onmouseover="this.style.backgroundColor='#0052a3'"
-                onmouseout="this.style.backgroundColor='#0066cc'"
-            >
-                {button_text}
-            </button>
-            <span id="copyStatus_{button_id}" style="margin-left: 10px; color: green; font-size: 12px; font-weight: bold;"></span>
-        </div>
-        
-        <script>
-        function copyToClipboard_{button_id}() {{
-            const text = "{escaped_content}";
-            
-            if (navigator.clipboard && window.isSecureContext) {{
-                // Modern clipboard API
-                navigator.clipboard.writeText(text).then(function() {{
-                    document.getElementById('copyStatus_{button_id}').innerText = '✅ Copied successfully!';
-                    setTimeout(() => {{
-                        document.getElementById('copyStatus_{button_id}').innerText = '';
-                    }}, 3000);
-                }}).catch(function(err) {{
-                    console.error('Could not copy text: ', err);
-                    fallbackCopy_{button_id}(text);
-                }});
-            }} else {{
-                fallbackCopy_{button_id}(text);
-            }}
-        }}
-        
-        function fallbackCopy_{button_id}(text) {{
-            // Fallback for older browsers
-            const textArea = document.createElement('textarea');
-            textArea.value = text;
-            textArea.style.position = 'fixed';
-            textArea.style.left = '-999999px';
-            textArea.style.top = '-999999px';
-            document.body.appendChild(textArea);
-            textArea.focus();
-            textArea.select();
-            
-            try {{
-                const successful = document.execCommand('copy');
-                if (successful) {{
-                    document.getElementById('copyStatus_{button_id}').innerText = '✅ Copied successfully!';
-                }} else {{
-                    document.getElementById('copyStatus_{button_id}').innerText = '⚠️ Copy may have failed - check manual method';
-                }}
-                setTimeout(() => {{
-                    document.getElementById('copyStatus_{button_id}').innerText = '';
-                }}, 3000);
-            }} catch (err) {{
-                console.error('Fallback copy failed: ', err);
-                document.getElementById('copyStatus_{button_id}').innerText = '❌ Copy failed - use manual method';
-                setTimeout(() => {{
-                    document.getElementById('copyStatus_{button_id}').innerText = '';
-                }}, 3000);
-            }}
-            
-            document.body.removeChild(textArea);
-        }}
-        </script>
-        """
+        return _build_copy_button_html(content, button_id, button_text)
     
     @staticmethod
     def _escape_for_javascript(text: str) -> str:
@@ -115,15 +170,7 @@ class ClipboardHelper:
         Returns:
             Escaped text safe for JavaScript
         """
-        return (text
-                .replace('\\', '\\\\')
-                .replace('"', '\\"')
-                .replace("'", "\\'")
-                .replace('\n', '\\n')
-                .replace('\r', '')
-                .replace('\t', '\\t')
-                .replace('`', '\\`')
-                .replace('${', '\\${'))
+        return _escape_for_javascript(text)
     
     @staticmethod
     def render_copy_methods(content: str, index: int, title: str = "Copy Content"):
@@ -150,7 +197,7 @@ class ClipboardHelper:
             "Manual Copy (Triple-click to select all):",
             value=content,
             height=120,
-            key=f"manual_copy_{index}_{hash(content) % 10000}",
+            key=f"manual_copy_{index}",
             help="Triple-click to select all text, then Ctrl+C (Windows) or Cmd+C (Mac) to copy"
         )
     
@@ -166,8 +213,12 @@ class ClipboardHelper:
         if not contents:
             return
         
+        # Tuples so the download payload builders can cache on them
+        contents = tuple(contents)
         if labels is None:
-            labels = [f"Content {i+1}" for i in range(len(contents))]
+            labels = tuple(f"Content {i+1}" for i in range(len(contents)))
+        else:
+            labels = tuple(labels)
         
         # Individual copy buttons
         for i, (content, label) in enumerate(zip(contents, labels)):
@@ -179,44 +230,34 @@ class ClipboardHelper:
         st.markdown("**📚 Bulk Operations:**")
         
         col1, col2, col3 = st.columns(3)
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         
         with col1:
             # Copy all as separate items
-            all_separate = "\n\n" + "="*50 + "\n\n".join([
-                f"{label.upper()}:\n\n{content}"
-                for label, content in zip(labels, contents)
-            ])
-            
             st.download_button(
                 label="💾 Download All Separate",
-                data=all_separate,
-                file_name=f"all_content_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
+                data=lambda: _bulk_separate_text(labels, contents),
+                file_name=f"all_content_{timestamp}.txt",
                 mime="text/plain",
                 help="Download all content in separate sections"
             )
         
         with col2:
             # Copy all as JSON
-            json_data = {
-                label: content for label, content in zip(labels, contents)
-            }
-            
             st.download_button(
                 label="📄 Download as JSON",
-                data=json.dumps(json_data, indent=2),
-                file_name=f"content_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+                data=lambda: _bulk_json_text(labels, contents),
+                file_name=f"content_data_{timestamp}.json",
                 mime="application/json",
                 help="Download all content as structured JSON"
             )
         
         with col3:
             # Copy all concatenated
-            all_concatenated = "\n\n".join(contents)
-            
             st.download_button(
                 label="📝 Download Concatenated",
-                data=all_concatenated,
-                file_name=f"concatenated_content_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
+                data=lambda: _bulk_concatenated_text(contents),
+                file_name=f"concatenated_content_{timestamp}.txt",
                 mime="text/plain",
                 help="Download all content concatenated together"
             )
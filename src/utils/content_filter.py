@@ -1,14 +1,142 @@
 """
 Content filtering and quality control module
 """
-from typing import Tuple
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+import asyncio
+import hashlib
+import logging
+import threading
 from src.utils.gemini_client import GeminiClient
+from src.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Prompt templates: invariant instructions come first and user content last, so every
+# call shares the same prompt prefix and only the substituted tail differs.
+_FILTER_CRITERIA = """Please analyze LinkedIn post content for professional standards.
+Check for:
+1. Appropriate professional language
+2. No controversial or offensive topics
+3. Professional tone suitable for LinkedIn
+4. No personal attacks or inappropriate content
+5. No misleading claims or misinformation
+Be strict but fair in your assessment.
+"""
+
+FILTER_PROMPT = _FILTER_CRITERIA + """
+Return only 'PASS' if content is appropriate, or 'FAIL: [specific reason]' if not.
+
+Text: {text}"""
+
+BATCH_FILTER_PROMPT = _FILTER_CRITERIA + """
+Return only a JSON array with one object per post, in the same order as the posts:
+[{{"pass": true, "reason": ""}}, {{"pass": false, "reason": "specific reason"}}]
+
+Number of posts: {count}
+
+Posts:
+{posts}"""
+
+# Structured output for BATCH_FILTER_PROMPT, so the verdicts always parse
+BATCH_FILTER_SCHEMA = {
+    "type": "ARRAY",
+    "items": {
+        "type": "OBJECT",
+        "properties": {
+            "pass": {"type": "BOOLEAN"},
+            "reason": {"type": "STRING"}
+        },
+        "required": ["pass", "reason"]
+    }
+}
+
+BATCH_REVIEW_PROMPT = _FILTER_CRITERIA + """
+Also score each post from 1-10 on engagement potential, professional tone, clarity and
+readability, value to readers and call-to-action effectiveness.
+
+Return only a JSON array with one object per post, in the same order as the posts.
+
+Number of posts: {count}
+
+Posts:
+{posts}"""
+
+QUALITY_PROMPT = """Analyze this LinkedIn post for quality metrics.
+
+Evaluate:
+1. Engagement potential (1-10)
+2. Professional tone (1-10)
+3. Clarity and readability (1-10)
+4. Value to readers (1-10)
+5. Call-to-action effectiveness (1-10)
+
+Format your response as:
+SCORE: [overall score 1-10]
+ENGAGEMENT: [score]
+TONE: [score]
+CLARITY: [score]
+VALUE: [score]
+CTA: [score]
+FEEDBACK: [brief feedback]
+
+Text: {text}"""
+
+# QUALITY_PROMPT response labels mapped to metric keys
+_QUALITY_KEYS = {
+    'ENGAGEMENT': 'engagement',
+    'TONE': 'tone',
+    'CLARITY': 'clarity',
+    'VALUE': 'value',
+    'CTA': 'cta',
+}
+
+# Structured output for BATCH_REVIEW_PROMPT: the filter verdict and quality scores in one object
+BATCH_REVIEW_SCHEMA = {
+    "type": "ARRAY",
+    "items": {
+        "type": "OBJECT",
+        "properties": {
+            "pass": {"type": "BOOLEAN"},
+            "reason": {"type": "STRING"},
+            "quality": {
+                "type": "OBJECT",
+                "properties": {metric: {"type": "INTEGER"} for metric in _QUALITY_KEYS.values()},
+                "required": list(_QUALITY_KEYS.values())
+            }
+        },
+        "required": ["pass", "reason", "quality"]
+    }
+}
 
 class ContentFilter:
     """Content filtering and quality guardrails"""
     
     def __init__(self, gemini_client: GeminiClient):
         self.gemini_client = gemini_client
+        self._verdicts: "OrderedDict[str, Tuple[bool, str]]" = OrderedDict()  # content digest -> (is_safe, result_message)
+        self._verdicts_lock = threading.Lock()  # Posts are filtered concurrently in worker threads
+    
+    @staticmethod
+    def _content_key(text: str) -> str:
+        """Compact digest used to memoize filter verdicts for identical content"""
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+    
+    def _cached_verdict(self, key: str) -> Optional[Tuple[bool, str]]:
+        """Return a memoized verdict, or None if the content hasn't been filtered yet"""
+        with self._verdicts_lock:
+            verdict = self._verdicts.get(key)
+            if verdict is not None:
+                self._verdicts.move_to_end(key)
+            return verdict
+    
+    def _remember_verdict(self, key: str, verdict: Tuple[bool, str]) -> None:
+        """Store a verdict, evicting the least recently used entry once the cache is full"""
+        with self._verdicts_lock:
+            self._verdicts[key] = verdict
+            self._verdicts.move_to_end(key)
+            if len(self._verdicts) > Config.FILTER_CACHE_SIZE:
+                self._verdicts.popitem(last=False)
     
     def filter_content(self, text: str) -> Tuple[bool, str]:
         """
@@ -20,24 +148,19 @@ class ContentFilter:
         Returns:
             Tuple of (is_safe, result_message)
         """
+        cache_key = self._content_key(text)
+        verdict = self._cached_verdict(cache_key)
+        if verdict is not None:
+            return verdict
+        
         try:
-            prompt = f"""Please analyze this LinkedIn post content for professional standards. 
-            Check for:
-            1. Appropriate professional language
-            2. No controversial or offensive topics
-            3. Professional tone suitable for LinkedIn
-            4. No personal attacks or inappropriate content
-            5. No misleading claims or misinformation
-            
-            Text: {text}
-            
-            Return only 'PASS' if content is appropriate, or 'FAIL: [specific reason]' if not.
-            Be strict but fair in your assessment."""
+            prompt = FILTER_PROMPT.format(text=text)
             
             response = self.gemini_client.generate_content(prompt)
             if response:
                 result = response.strip()
                 is_safe = result.startswith('PASS')
+                self._remember_verdict(cache_key, (is_safe, result))
                 return is_safe, result
             else:
                 return False, "Error: Could not analyze content"
@@ -45,6 +168,140 @@ class ContentFilter:
         except Exception as e:
             return False, f"Error in content filtering: {str(e)}"
     
+    def filter_contents_batch(self, posts: List[str]) -> List[Tuple[bool, str]]:
+        """
+        Filter several posts with a single Gemini call
+        
+        Args:
+            posts: Contents to filter
+            
+        Returns:
+            List of (is_safe, result_message) tuples, one per post in the same order
+        """
+        verdicts: List[Optional[Tuple[bool, str]]] = [
+            self._cached_verdict(self._content_key(post)) for post in posts
+        ]
+        pending = [i for i, verdict in enumerate(verdicts) if verdict is None]
+        
+        if len(pending) == 1:
+            verdicts[pending[0]] = self.filter_content(posts[pending[0]])
+        elif pending:
+            batch_verdicts = self._request_batch_verdicts([posts[i] for i in pending])
+            for i, verdict in zip(pending, batch_verdicts):
+                verdicts[i] = verdict
+        
+        return verdicts
+    
+    def _request_batch_verdicts(self, posts: List[str]) -> List[Tuple[bool, str]]:
+        """Ask Gemini for a JSON array of verdicts, falling back to per-post checks if it can't be parsed"""
+        numbered_posts = "\n\n".join(f"[{i}] {post}" for i, post in enumerate(posts, 1))
+        prompt = BATCH_FILTER_PROMPT.format(count=len(posts), posts=numbered_posts)
+        
+        try:
+            response = self.gemini_client.generate_content(prompt, response_schema=BATCH_FILTER_SCHEMA)
+            items = GeminiClient.parse_json(response or "")
+            if not isinstance(items, list) or len(items) != len(posts):
+                raise ValueError("Verdict count does not match post count")
+            
+            verdicts = []
+            for post, item in zip(posts, items):
+                is_safe = bool(item.get("pass"))
+                result = "PASS" if is_safe else f"FAIL: {item.get('reason') or 'No reason given'}"
+                self._remember_verdict(self._content_key(post), (is_safe, result))
+                verdicts.append((is_safe, result))
+            return verdicts
+            
+        except Exception as e:
+            logger.warning("Batch content filtering failed, checking posts individually: %s", e)
+            return [self.filter_content(post) for post in posts]
+    
+    def review_posts_batch(self, posts: List[str]) -> List[Tuple[bool, str, dict]]:
+        """
+        Filter and score several posts with a single Gemini call
+        
+        Replaces a filter_contents_batch call plus one check_post_quality call per post.
+        
+        Args:
+            posts: Contents to review
+            
+        Returns:
+            List of (is_safe, result_message, metrics) tuples, one per post in the same order.
+            metrics is empty if the scores could not be parsed.
+        """
+        if not posts:
+            return []
+        
+        numbered_posts = "\n\n".join(f"[{i}] {post}" for i, post in enumerate(posts, 1))
+        prompt = BATCH_REVIEW_PROMPT.format(count=len(posts), posts=numbered_posts)
+        
+        try:
+            response = self.gemini_client.generate_content(prompt, response_schema=BATCH_REVIEW_SCHEMA)
+            items = GeminiClient.parse_json(response or "")
+            if not isinstance(items, list) or len(items) != len(posts):
+                raise ValueError("Review count does not match post count")
+            
+            reviews = []
+            for post, item in zip(posts, items):
+                is_safe = bool(item.get("pass"))
+                result = "PASS" if is_safe else f"FAIL: {item.get('reason') or 'No reason given'}"
+                self._remember_verdict(self._content_key(post), (is_safe, result))
+                quality = item.get("quality") or {}
+                metrics = {metric: int(quality[metric]) for metric in _QUALITY_KEYS.values() if metric in quality}
+                reviews.append((is_safe, result, metrics))
+            return reviews
+            
+        except Exception as e:
+            logger.warning("Batch post review failed, filtering without scores: %s", e)
+            return [(is_safe, result, {}) for is_safe, result in self.filter_contents_batch(posts)]
+    
+    async def review_posts_batch_async(self, posts: List[str]) -> List[Tuple[bool, str, dict]]:
+        """
+        Async variant of review_posts_batch so the review can run alongside other calls
+        
+        Args:
+            posts: Contents to review
+            
+        Returns:
+            List of (is_safe, result_message, metrics) tuples, one per post in the same order
+        """
+        return await asyncio.to_thread(self.review_posts_batch, posts)
+    
+    async def filter_contents_batch_async(self, posts: List[str]) -> List[Tuple[bool, str]]:
+        """
+        Async variant of filter_contents_batch so the batch can run alongside other calls
+        
+        Args:
+            posts: Contents to filter
+            
+        Returns:
+            List of (is_safe, result_message) tuples, one per post in the same order
+        """
+        return await asyncio.to_thread(self.filter_contents_batch, posts)
+    
+    async def filter_content_async(self, text: str) -> Tuple[bool, str]:
+        """
+        Async variant of filter_content so several posts can be checked concurrently
+        
+        Args:
+            text: Content to filter
+            
+        Returns:
+            Tuple of (is_safe, result_message)
+        """
+        return await asyncio.to_thread(self.filter_content, text)
+    
+    async def check_post_quality_async(self, text: str) -> Tuple[bool, str, dict]:
+        """
+        Async variant of check_post_quality so several posts can be scored concurrently
+        
+        Args:
+            text: Post content to analyze
+            
+        Returns:
+            Tuple of (is_quality, feedback, metrics)
+        """
+        return await asyncio.to_thread(self.check_post_quality, text)
+    
     def check_post_quality(self, text: str) -> Tuple[bool, str, dict]:
         """
         Check post quality and provide metrics
@@ -56,25 +313,7 @@ class ContentFilter:
             Tuple of (is_quality, feedback, metrics)
         """
         try:
-            prompt = f"""Analyze this LinkedIn post for quality metrics:
-            
-            Text: {text}
-            
-            Evaluate:
-            1. Engagement potential (1-10)
-            2. Professional tone (1-10) 
-            3. Clarity and readability (1-10)
-            4. Value to readers (1-10)
-            5. Call-to-action effectiveness (1-10)
-            
-            Format your response as:
-            SCORE: [overall score 1-10]
-            ENGAGEMENT: [score]
-            TONE: [score]
-            CLARITY: [score]
-            VALUE: [score]
-            CTA: [score]
-            FEEDBACK: [brief feedback]"""
+            prompt = QUALITY_PROMPT.format(text=text)
             
             response = self.gemini_client.generate_content(prompt)
             if response:
@@ -84,20 +323,20 @@ class ContentFilter:
                 overall_score = 0
                 
                 for line in lines:
-                    if line.startswith('SCORE:'):
-                        overall_score = int(line.split(':')[1].strip())
-                    elif line.startswith('ENGAGEMENT:'):
-                        metrics['engagement'] = int(line.split(':')[1].strip())
-                    elif line.startswith('TONE:'):
-                        metrics['tone'] = int(line.split(':')[1].strip())
-                    elif line.startswith('CLARITY:'):
-                        metrics['clarity'] = int(line.split(':')[1].strip())
-                    elif line.startswith('VALUE:'):
-                        metrics['value'] = int(line.split(':')[1].strip())
-                    elif line.startswith('CTA:'):
-                        metrics['cta'] = int(line.split(':')[1].strip())
-                    elif line.startswith('FEEDBACK:'):
-                        feedback = line.split(':')[1].strip()
+                    label, sep, value = line.partition(':')
+                    if not sep:
+                        continue
+                    value = value.strip()
+                    if label == 'FEEDBACK':
+                        feedback = value
+                        continue
+                    try:
+                        if label == 'SCORE':
+                            overall_score = int(value)
+                        elif label in _QUALITY_KEYS:
+                            metrics[_QUALITY_KEYS[label]] = int(value)
+                    except ValueError:
+                        logger.debug("Skipping malformed quality line: %r", line)
                 
                 is_quality = overall_score >= 6
                 return is_quality, feedback, metrics
@@ -1,14 +1,33 @@
 """
 Cost estimation module for API usage tracking
 """
+from functools import lru_cache
+from types import MappingProxyType
 from typing import Dict
+import threading
 import time
 
+@lru_cache(maxsize=None)
+def _get_encoding():
+    """
+    Return the tiktoken cl100k_base encoding, or None if tiktoken is not installed or the
+    encoding data cannot be loaded offline
+
+    A real BPE tokenizer gives closer counts than the 4-characters-per-token rule; cl100k_base
+    is not Gemini's tokenizer, but is a far better approximation for estimates. Loaded on first
+    use rather than at import, since tiktoken downloads the data on a fresh machine.
+    """
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
 class CostEstimator:
     """Estimate costs and track API usage"""
     
     # Gemini pricing (approximate, check current pricing)
-    GEMINI_PRICING = {
+    GEMINI_PRICING = MappingProxyType({
         "gemini-1.5-flash": {
             "input": 0.075 / 1000000,   # $0.075 per 1M input tokens
             "output": 0.3 / 1000000     # $0.30 per 1M output tokens
@@ -21,9 +40,10 @@ class CostEstimator:
             "input": 0.5 / 1000000,     # $0.50 per 1M input tokens (legacy pricing)
             "output": 1.5 / 1000000     # $1.50 per 1M output tokens
         }
-    }
+    })
     
     def __init__(self):
+        self._lock = threading.Lock()  # Requests may be tracked from concurrent worker threads
         self.session_stats = {
             "requests": 0,
             "estimated_input_tokens": 0,
@@ -32,9 +52,10 @@ class CostEstimator:
             "start_time": time.time()
         }
     
-    def estimate_tokens(self, text: str) -> int:
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
         """
-        Rough token estimation (1 token ≈ 4 characters for English)
+        Token estimation (tiktoken when installed, otherwise 1 token ≈ 4 characters)
         
         Args:
             text: Input text
@@ -42,7 +63,10 @@ class CostEstimator:
         Returns:
             Estimated token count
         """
-        return len(text) // 4
+        encoding = _get_encoding()
+        if encoding is not None:
+            return len(encoding.encode_ordinary(text))
+        return len(text) >> 2
     
     def estimate_request_cost(self, model_name: str, input_text: str, output_text: str) -> Dict:
         """
@@ -57,37 +81,38 @@ class CostEstimator:
             Dictionary with cost breakdown
         """
         # Clean model name to match pricing keys
-        clean_model_name = model_name.replace("models/", "")
+        clean_model_name = model_name.removeprefix("models/")
         
-        # Get pricing info
-        if clean_model_name in self.GEMINI_PRICING:
-            pricing = self.GEMINI_PRICING[clean_model_name]
-        else:
-            # Default to flash pricing if model not found
-            pricing = self.GEMINI_PRICING["gemini-1.5-flash"]
+        # Get pricing info, defaulting to flash pricing if model not found
+        pricing = self.GEMINI_PRICING.get(clean_model_name) or self.GEMINI_PRICING["gemini-1.5-flash"]
+        input_rate, output_rate = pricing["input"], pricing["output"]
         
         # Estimate tokens
-        input_tokens = self.estimate_tokens(input_text)
-        output_tokens = self.estimate_tokens(output_text)
+        encoding = _get_encoding()
+        if encoding is not None:
+            input_tokens, output_tokens = map(len, encoding.encode_ordinary_batch([input_text, output_text]))
+        else:
+            input_tokens, output_tokens = len(input_text) >> 2, len(output_text) >> 2
         
         # Calculate costs
-        input_cost = input_tokens * pricing["input"]
-        output_cost = output_tokens * pricing["output"]
+        input_cost = input_tokens * input_rate
+        output_cost = output_tokens * output_rate
         total_cost = input_cost + output_cost
         
         # Update session stats
-        self.session_stats["requests"] += 1
-        self.session_stats["estimated_input_tokens"] += input_tokens
-        self.session_stats["estimated_output_tokens"] += output_tokens
-        self.session_stats["estimated_cost"] += total_cost
+        with self._lock:
+            self.session_stats["requests"] += 1
+            self.session_stats["estimated_input_tokens"] += input_tokens
+            self.session_stats["estimated_output_tokens"] += output_tokens
+            self.session_stats["estimated_cost"] += total_cost
         
         return {
             "model": clean_model_name,
             "input_tokens": input_tokens,
             "output_tokens": output_tokens,
-            "input_cost": round(input_cost, 6),
-            "output_cost": round(output_cost, 6),
-            "total_cost": round(total_cost, 6),
+            "input_cost": input_cost,
+            "output_cost": output_cost,
+            "total_cost": total_cost,
             "cost_formatted": f"${total_cost:.6f}"
         }
     
@@ -1,18 +1,83 @@
 """
 Gemini AI client module
 """
-import google.generativeai as genai
-from typing import Optional, Tuple, List
+from concurrent.futures import Future, ThreadPoolExecutor
+from google import genai
+from google.genai import errors, types
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+import asyncio
+import httpx
+import importlib.util
+import json
+import logging
+import random
+import threading
 import time
 from src.config import Config
+from src.utils.llm_cache import LLMCache
+
+logger = logging.getLogger(__name__)
+
+# Optional: with the h2 package installed, concurrent calls are multiplexed over one HTTP/2 connection
+_HTTP2 = importlib.util.find_spec("h2") is not None
+
+# Optional: orjson parses structured responses several times faster than the json module
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def create_client() -> genai.Client:
+    """
+    Create a long-lived Gemini API client
+    
+    The client keeps a pool of HTTP connections alive (HTTP/2 when h2 is installed), so
+    sharing one instance across requests avoids repeating the TLS handshake for every
+    call and lets concurrent calls reuse warm connections.
+    
+    Returns:
+        Configured genai.Client
+    """
+    if not Config.GEMINI_API_KEY:
+        raise ValueError("Gemini API key not found")
+    
+    return genai.Client(
+        api_key=Config.GEMINI_API_KEY,
+        http_options=types.HttpOptions(
+            timeout=Config.REQUEST_TIMEOUT_MS,
+            client_args={
+                "http2": _HTTP2,
+                "limits": httpx.Limits(
+                    max_connections=Config.HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=Config.HTTP_MAX_CONNECTIONS
+                )
+            }
+        )
+    )
+
+def _is_retryable(error: Exception) -> bool:
+    """Rate limits, timeouts and server errors are transient; other API errors (bad request, auth) are not"""
+    if isinstance(error, errors.APIError):
+        return error.code in (408, 429) or error.code >= 500
+    return True  # Transport failures (connection resets, read timeouts)
+
+def _backoff_delay(attempt: int) -> float:
+    """Exponential backoff with jitter, so concurrent retries don't arrive together"""
+    return min(Config.RETRY_MAX_DELAY, Config.RETRY_BASE_DELAY * 2 ** attempt) + random.uniform(0, Config.RETRY_JITTER)
 
 class GeminiClient:
     """Gemini AI client for content generation with cost tracking"""
     
-    def __init__(self):
-        self.model = None
+    def __init__(self, client: Optional[genai.Client] = None):
+        self.client = client  # Shared API client; created on demand if not injected
         self.model_name = None
         self.cost_tracker = None  # Will be injected by the agent
+        self._connection_checked_at = 0.0  # When test_connection last succeeded
+        self._connection_result: Optional[Tuple[bool, str]] = None
+        self.response_cache = LLMCache(path=Config.RESPONSE_CACHE_PATH or None)  # Exact-match responses for callers passing cache_ttl
+        self._inflight: Dict[str, Future] = {}  # Request key -> result of the call currently in flight
+        self._inflight_lock = threading.Lock()
+        self._unavailable_models: set = set()  # Routed models that returned 404 for this API key
         self._initialize_model()
     
     def set_cost_tracker(self, cost_tracker):
@@ -21,91 +86,320 @@ class GeminiClient:
     
     def _initialize_model(self) -> None:
         """Initialize Gemini model with fallback options"""
-        if not Config.GEMINI_API_KEY:
-            raise ValueError("Gemini API key not found")
-        
-        # Configure Gemini API
-        genai.configure(api_key=Config.GEMINI_API_KEY)
+        # Configure Gemini API client
+        if self.client is None:
+            self.client = create_client()
         
+        # Probe every candidate at once, then take the first working model in
+        # preference order, so startup waits for one round-trip instead of several
+        executor = ThreadPoolExecutor(max_workers=len(Config.SUPPORTED_MODELS))
+        probes = [(model_name, executor.submit(self._probe_model, model_name)) for model_name in Config.SUPPORTED_MODELS]
         last_error = None
-        
-        for model_name in Config.SUPPORTED_MODELS:
-            try:
-                test_model = genai.GenerativeModel(model_name)
-                # Test the model with a simple prompt
-                test_response = test_model.generate_content("Hello")
-                if test_response and test_response.text:
-                    self.model = test_model
-                    self.model_name = model_name
-                    print(f"Successfully initialized model: {model_name}")
-                    return
-            except Exception as e:
-                last_error = e
-                print(f"Failed to initialize {model_name}: {str(e)}")
-                continue
+        try:
+            for model_name, probe in probes:
+                try:
+                    if probe.result():
+                        self.model_name = model_name
+                        logger.info("Successfully initialized model: %s", model_name)
+                        # The probe doubles as the first connection test
+                        self._connection_result = (True, f"Successfully connected to {model_name}")
+                        self._connection_checked_at = time.time()
+                        return
+                except Exception as e:
+                    last_error = e
+                    logger.warning("Failed to initialize %s: %s", model_name, e)
+        finally:
+            # Lower-preference probes still in flight are left to finish on their own
+            executor.shutdown(wait=False, cancel_futures=True)
         
         # If no model works, raise an error
         raise Exception(f"Could not initialize any Gemini model. Last error: {last_error}")
     
-    def generate_content(self, prompt: str, max_retries: int = 3) -> Optional[str]:
+    def _probe_model(self, model_name: str) -> bool:
+        """Test a model with a simple prompt"""
+        test_response = self.client.models.generate_content(model=model_name, contents="Hello")
+        return bool(test_response and test_response.text)
+    
+    @staticmethod
+    def _generation_config(response_schema: Optional[dict]) -> Optional[types.GenerateContentConfig]:
+        """Request structured JSON output when a schema is given"""
+        if response_schema is None:
+            return None
+        return types.GenerateContentConfig(
+            response_mime_type="application/json",
+            response_schema=response_schema
+        )
+    
+    @staticmethod
+    def parse_json(text: str) -> Any:
+        """
+        Parse a JSON response, removing markdown code fences Gemini sometimes wraps around it
+        
+        Raises:
+            ValueError: If the text is not valid JSON
+        """
+        text = text.strip()
+        if text.startswith("```"):
+            text = text.split("\n", 1)[1] if "\n" in text else ""
+            text = text.rsplit("```", 1)[0]
+        return orjson.loads(text) if orjson else json.loads(text)  # orjson.JSONDecodeError is a ValueError
+    
+    def generate_content(self, prompt: str, max_retries: int = 3, response_schema: Optional[dict] = None,
+                         cache_ttl: Optional[float] = None, model: Optional[str] = None) -> Optional[str]:
         """
         Generate content using Gemini model with retry logic and cost tracking
         
         Args:
             prompt: The prompt to send to the model
             max_retries: Maximum number of retry attempts
+            response_schema: Optional schema forcing a JSON response of that shape
+            cache_ttl: Seconds to reuse the response for an identical prompt (not cached if None)
+            model: Model name or Config.MODEL_ALIASES alias to use instead of the initialized
+                model; falls back to the initialized model if the call fails
             
         Returns:
             Generated content or None if failed
         """
-        if not self.model:
+        if not self.model_name:
             raise Exception("Gemini model not initialized")
         
+        model_name = self._resolve_model(model)
+        key = f"{model_name}\0{json.dumps(response_schema, sort_keys=True)}\0{prompt}"
+        
+        def generate() -> Optional[str]:
+            try:
+                return self._single_flight(key, lambda: self._generate_uncached(prompt, max_retries, response_schema, model_name))
+            except Exception as e:
+                if model_name == self.model_name:
+                    raise
+                if isinstance(e, errors.ClientError) and e.code == 404:
+                    self._unavailable_models.add(model_name)  # Don't route to it again
+                logger.warning("Routed model %s failed, using %s: %s", model_name, self.model_name, e)
+                return self.generate_content(prompt, max_retries, response_schema)
+        
+        if cache_ttl:
+            return self.response_cache.get_or_compute("generate_content", key, cache_ttl, generate)
+        return generate()
+    
+    def _single_flight(self, key: str, compute: Callable[[], Optional[str]]) -> Optional[str]:
+        """
+        Run compute once for concurrent identical requests
+        
+        The first caller makes the API call; callers arriving while it is in flight wait
+        for and share its result (or exception) instead of paying for a duplicate call.
+        """
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = self._inflight[key] = Future()
+        
+        if not is_leader:
+            return future.result()
+        
+        try:
+            result = compute()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._inflight_lock:
+                del self._inflight[key]
+    
+    def _resolve_model(self, model: Optional[str]) -> str:
+        """Map a routing alias to a model name, using the initialized model by default"""
+        model_name = Config.MODEL_ALIASES.get(model, model) if model else None
+        if not model_name or model_name in self._unavailable_models:
+            return self.model_name
+        return model_name
+    
+    def _generate_uncached(self, prompt: str, max_retries: int, response_schema: Optional[dict], model_name: str) -> Optional[str]:
+        """Call the model, retrying transient failures"""
+        config = self._generation_config(response_schema)
         for attempt in range(max_retries):
             try:
-                response = self.model.generate_content(prompt)
+                response = self.client.models.generate_content(model=model_name, contents=prompt, config=config)
                 if response and response.text:
                     output_text = response.text.strip()
                     
                     # Track costs if cost tracker is available
                     if self.cost_tracker:
                         self.cost_tracker.estimate_request_cost(
-                            self.model_name, 
+                            model_name, 
                             prompt, 
                             output_text
                         )
                     
                     return output_text
                 else:
-                    print(f"Empty response on attempt {attempt + 1}")
+                    logger.warning("Empty response on attempt %d", attempt + 1)
             except Exception as e:
-                print(f"Error on attempt {attempt + 1}: {str(e)}")
-                if attempt < max_retries - 1:
-                    time.sleep(1)  # Wait before retry
+                logger.warning("Error on attempt %d: %s", attempt + 1, e)
+                if attempt < max_retries - 1 and _is_retryable(e):
+                    time.sleep(_backoff_delay(attempt))  # Wait before retry
                 else:
                     raise e
         
         return None
     
+    async def generate_content_async(self, prompt: str, max_retries: int = 3, response_schema: Optional[dict] = None,
+                                     cache_ttl: Optional[float] = None, model: Optional[str] = None) -> Optional[str]:
+        """
+        Async variant of generate_content so independent calls can be awaited together
+        
+        The sync client call runs in a worker thread, which keeps retries and cost
+        tracking identical to the sync path while letting asyncio.gather overlap requests.
+        client.aio is not used because its pooled connections are bound to the event loop
+        that opened them, and every generation runs on a fresh loop via asyncio.run.
+        
+        Args:
+            prompt: The prompt to send to the model
+            max_retries: Maximum number of retry attempts
+            response_schema: Optional schema forcing a JSON response of that shape
+            cache_ttl: Seconds to reuse the response for an identical prompt (not cached if None)
+            model: Model name or Config.MODEL_ALIASES alias to use instead of the initialized model
+            
+        Returns:
+            Generated content or None if failed
+        """
+        return await asyncio.to_thread(self.generate_content, prompt, max_retries, response_schema, cache_ttl, model)
+    
+    def generate_content_stream(self, prompt: str, max_retries: int = 3, response_schema: Optional[dict] = None,
+                                model: Optional[str] = None) -> Iterator[str]:
+        """
+        Stream generated content chunk by chunk with cost tracking
+        
+        Retries only happen before the first chunk has been yielded, so callers
+        never see duplicated text.
+        
+        Args:
+            prompt: The prompt to send to the model
+            max_retries: Maximum number of retry attempts
+            response_schema: Optional schema forcing a JSON response of that shape
+            model: Model name or Config.MODEL_ALIASES alias to use instead of the initialized model
+            
+        Yields:
+            Text chunks as they arrive from the model
+        """
+        if not self.model_name:
+            raise Exception("Gemini model not initialized")
+        
+        model_name = self._resolve_model(model)
+        config = self._generation_config(response_schema)
+        for attempt in range(max_retries):
+            output_parts = []
+            try:
+                for chunk in self.client.models.generate_content_stream(model=model_name, contents=prompt, config=config):
+                    text = chunk.text  # None for chunks without text parts (e.g. finish metadata)
+                    if text:
+                        output_parts.append(text)
+                        yield text
+                
+                if output_parts:
+                    if self.cost_tracker:
+                        self.cost_tracker.estimate_request_cost(
+                            model_name, 
+                            prompt, 
+                            "".join(output_parts)
+                        )
+                    return
+                logger.warning("Empty streamed response on attempt %d", attempt + 1)
+            except Exception as e:
+                logger.warning("Streaming error on attempt %d: %s", attempt + 1, e)
+                if output_parts or attempt == max_retries - 1 or not _is_retryable(e):
+                    raise e
+                time.sleep(_backoff_delay(attempt))  # Wait before retry
+    
+    async def generate_content_stream_async(self, prompt: str, max_retries: int = 3, response_schema: Optional[dict] = None,
+                                            model: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        Async variant of generate_content_stream
+        
+        The blocking stream is consumed in a worker thread and its chunks are handed
+        to the event loop through a queue, so callers can update the UI as text arrives.
+        
+        Args:
+            prompt: The prompt to send to the model
+            max_retries: Maximum number of retry attempts
+            response_schema: Optional schema forcing a JSON response of that shape
+            model: Model name or Config.MODEL_ALIASES alias to use instead of the initialized model
+            
+        Yields:
+            Text chunks as they arrive from the model
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        done = object()
+        
+        def produce():
+            try:
+                for chunk in self.generate_content_stream(prompt, max_retries, response_schema, model):
+                    loop.call_soon_threadsafe(queue.put_nowait, chunk)
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, done)
+        
+        producer = asyncio.create_task(asyncio.to_thread(produce))
+        while True:
+            item = await queue.get()
+            if item is done:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+        await producer
+    
+    def embed_content(self, text: str) -> Optional[List[float]]:
+        """
+        Embed text for semantic similarity lookups
+        
+        Args:
+            text: Text to embed
+            
+        Returns:
+            Embedding vector or None if the response had none
+        """
+        result = self.client.models.embed_content(model=Config.EMBEDDING_MODEL, contents=text)
+        if result and result.embeddings:
+            return list(result.embeddings[0].values or []) or None
+        return None
+    
     def test_connection(self) -> Tuple[bool, str]:
         """
         Test the connection to Gemini API
         
+        A successful result is reused for Config.HEALTH_CHECK_TTL seconds, so frequent
+        health checks don't each cost a model round-trip. Failures are never reused.
+        
         Returns:
             Tuple of (success, message)
         """
+        if self._connection_result and time.time() - self._connection_checked_at < Config.HEALTH_CHECK_TTL:
+            return self._connection_result
+        
         try:
             response = self.generate_content("Test connection")
             if response:
-                return True, f"Successfully connected to {self.model_name}"
+                self._connection_result = (True, f"Successfully connected to {self.model_name}")
+                self._connection_checked_at = time.time()
+                return self._connection_result
             else:
                 return False, "No response from model"
         except Exception as e:
             return False, f"Connection failed: {str(e)}"
     
+    def close(self) -> None:
+        """Close the HTTP connections held by the underlying Gemini client"""
+        if self.client:
+            self.client.close()
+    
     def get_model_info(self) -> dict:
         """Get information about the current model"""
         return {
             "model_name": self.model_name,
-            "status": "connected" if self.model else "disconnected"
+            "status": "connected" if self.model_name else "disconnected"
         }
@@ -1,14 +1,69 @@
 """
 Hashtag generation module
 """
-from typing import List
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+import asyncio
+import logging
+import re
+import threading
+import time
 from src.utils.gemini_client import GeminiClient
+from src.config import Config
+
+logger = logging.getLogger(__name__)
+
+_HASHTAG_RE = re.compile(r'#\w+')
+_STRIP_SPACE_DASH = str.maketrans('', '', ' -')  # Deletes spaces and dashes in one pass
+
+# Invariant instructions first, request-specific details last, so calls share a prompt prefix
+HASHTAG_PROMPT = """Generate highly relevant and trending LinkedIn hashtags for the post described below.
+
+Requirements:
+1. Use popular LinkedIn hashtags that actually exist
+2. Mix of broad and specific hashtags
+3. Include industry-relevant tags
+4. Ensure hashtags are professional and appropriate
+5. Focus on discoverability and engagement
+
+Format: Return only the hashtags, one per line, starting with #
+Example:
+#Leadership
+#BusinessStrategy
+#ProfessionalDevelopment
+
+Number of hashtags: {count}
+Topic: {topic}
+Audience: {audience}
+Post Type: {post_type}"""
 
 class HashtagGenerator:
     """Generate relevant hashtags for LinkedIn posts"""
     
     def __init__(self, gemini_client: GeminiClient):
         self.gemini_client = gemini_client
+        self._cache: "OrderedDict[Tuple[str, str, str, int], Tuple[float, List[str]]]" = OrderedDict()  # key -> (expires_at, hashtags)
+        self._cache_lock = threading.Lock()  # Hashtags are generated concurrently with research in worker threads
+    
+    def _cached_hashtags(self, key: Tuple[str, str, str, int]) -> Optional[List[str]]:
+        """Return unexpired memoized hashtags, dropping the entry if it has expired"""
+        with self._cache_lock:
+            cached = self._cache.get(key)
+            if cached is None:
+                return None
+            if cached[0] <= time.time():
+                del self._cache[key]
+                return None
+            self._cache.move_to_end(key)
+            return list(cached[1])
+    
+    def _remember_hashtags(self, key: Tuple[str, str, str, int], hashtags: List[str]) -> None:
+        """Store hashtags, evicting the least recently used entry once the cache is full"""
+        with self._cache_lock:
+            self._cache[key] = (time.time() + Config.HASHTAG_CACHE_TTL, hashtags)
+            self._cache.move_to_end(key)
+            if len(self._cache) > Config.HASHTAG_CACHE_SIZE:
+                self._cache.popitem(last=False)
     
     def generate_hashtags(self, topic: str, audience: str = "", post_type: str = "", count: int = 5) -> List[str]:
         """
@@ -23,46 +78,74 @@ class HashtagGenerator:
         Returns:
             List of hashtags
         """
+        cache_key = (topic, audience, post_type, count)
+        cached = self._cached_hashtags(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
-            prompt = f"""Generate {count} highly relevant and trending LinkedIn hashtags for:
-            
-            Topic: {topic}
-            {f'Audience: {audience}' if audience else ''}
-            {f'Post Type: {post_type}' if post_type else ''}
-            
-            Requirements:
-            1. Use popular LinkedIn hashtags that actually exist
-            2. Mix of broad and specific hashtags
-            3. Include industry-relevant tags
-            4. Ensure hashtags are professional and appropriate
-            5. Focus on discoverability and engagement
-            
-            Format: Return only the hashtags, one per line, starting with #
-            Example:
-            #Leadership
-            #BusinessStrategy
-            #ProfessionalDevelopment"""
+            prompt = HASHTAG_PROMPT.format(
+                count=count,
+                topic=topic,
+                audience=audience or "General professional audience",
+                post_type=post_type or "Any"
+            )
             
             response = self.gemini_client.generate_content(prompt)
             if response:
-                hashtags = []
-                lines = response.split('\n')
-                for line in lines:
-                    line = line.strip()
-                    if line.startswith('#') and len(line) > 1:
-                        # Clean up the hashtag
-                        hashtag = line.split()[0]  # Take only the first word if there are spaces
-                        if hashtag not in hashtags:  # Avoid duplicates
-                            hashtags.append(hashtag)
-                
-                return hashtags[:count]  # Return only requested count
+                hashtags = self.clean_hashtags(_HASHTAG_RE.findall(response), count)
+                if hashtags:
+                    self._remember_hashtags(cache_key, hashtags)
+                return list(hashtags)
             else:
                 return self._get_fallback_hashtags(topic)
                 
         except Exception as e:
-            print(f"Error generating hashtags: {str(e)}")
+            logger.warning("Error generating hashtags: %s", e)
             return self._get_fallback_hashtags(topic)
     
+    async def generate_hashtags_async(self, topic: str, audience: str = "", post_type: str = "", count: int = 5) -> List[str]:
+        """
+        Async variant of generate_hashtags so it can run alongside other Gemini calls
+        
+        Args:
+            topic: Main topic of the post
+            audience: Target audience
+            post_type: Type of post (story, tips, etc.)
+            count: Number of hashtags to generate
+            
+        Returns:
+            List of hashtags
+        """
+        return await asyncio.to_thread(self.generate_hashtags, topic, audience, post_type, count)
+    
+    @staticmethod
+    def clean_hashtags(candidates: List[str], count: int = 5) -> List[str]:
+        """
+        Normalize raw hashtag candidates into unique single-word #tags
+        
+        Args:
+            candidates: Hashtags as returned by the model, with or without '#'
+            count: Maximum number of hashtags to keep
+            
+        Returns:
+            List of hashtags
+        """
+        hashtags = {}  # Insertion-ordered set, avoids duplicates
+        for candidate in candidates:
+            if len(hashtags) >= count:  # Return only requested count
+                break
+            words = str(candidate).split()
+            if not words:
+                continue
+            hashtag = words[0]  # Take only the first word if there are spaces
+            if not hashtag.startswith('#'):
+                hashtag = f"#{hashtag}"
+            if len(hashtag) > 1:
+                hashtags[hashtag] = None
+        
+        return list(hashtags)
+    
     def _get_fallback_hashtags(self, topic: str) -> List[str]:
         """
         Generate fallback hashtags when AI generation fails
@@ -77,7 +160,7 @@ class HashtagGenerator:
         fallback_tags = ["#LinkedIn", "#Professional", "#Career", "#Business", "#Leadership"]
         
         # Try to create a topic-specific hashtag
-        topic_words = topic.replace(" ", "").replace("-", "")
+        topic_words = topic.translate(_STRIP_SPACE_DASH)
         if len(topic_words) > 3:
             topic_tag = f"#{topic_words.title()}"
             fallback_tags.insert(1, topic_tag)
@@ -108,7 +191,7 @@ class HashtagGenerator:
             
             Provide a brief analysis of the hashtag mix and suggestions for improvement."""
             
-            response = self.gemini_client.generate_content(prompt)
+            response = self.gemini_client.generate_content(prompt, cache_ttl=Config.HASHTAG_CACHE_TTL)
             if response:
                 return {
                     "analysis": response,
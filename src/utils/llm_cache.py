@@ -0,0 +1,317 @@
+"""
+Response cache for research-stage Gemini calls
+"""
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+import numpy as np
+from src.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Optional: orjson (de)serializes persisted entries several times faster than the json module
+try:
+    import orjson
+    _dumps, _loads = lambda value: orjson.dumps(value).decode(), orjson.loads
+except ImportError:
+    _dumps, _loads = json.dumps, json.loads
+
+_MISS = object()
+
+# An embedder may return a plain list of floats or a numpy array
+Vector = Union[List[float], np.ndarray]
+
+class _SemanticIndex:
+    """Unit-length embeddings of one namespace as a matrix, so a lookup is one matrix-vector product"""
+
+    def __init__(self):
+        self.vectors: Optional[np.ndarray] = None  # (entries, dimensions)
+        self.expires_at: List[float] = []
+        self.values: List[Any] = []
+
+    def _keep(self, mask: List[bool]) -> None:
+        self.vectors = self.vectors[np.asarray(mask)] if any(mask) else None
+        self.expires_at = [t for t, keep in zip(self.expires_at, mask) if keep]
+        self.values = [v for v, keep in zip(self.values, mask) if keep]
+
+    def search(self, embedding: np.ndarray, threshold: float, now: float) -> Any:
+        if self.vectors is None:
+            return _MISS
+        if min(self.expires_at) <= now:
+            self._keep([t > now for t in self.expires_at])
+            if self.vectors is None:
+                return _MISS
+        if self.vectors.shape[1] != embedding.shape[0]:  # Embedder changed dimensions
+            return _MISS
+        scores = self.vectors @ embedding  # Cosine similarity, both sides are unit length
+        best = int(np.argmax(scores))
+        return self.values[best] if scores[best] >= threshold else _MISS
+
+    def add(self, embedding: np.ndarray, expires_at: float, value: Any, maxsize: int) -> None:
+        if self.vectors is not None and self.vectors.shape[1] != embedding.shape[0]:
+            self.vectors, self.expires_at, self.values = None, [], []
+        row = embedding[np.newaxis, :]
+        self.vectors = row if self.vectors is None else np.vstack((self.vectors, row))
+        self.expires_at.append(expires_at)
+        self.values.append(value)
+        if len(self.values) > maxsize:  # Drop the oldest entry
+            self._keep([False] + [True] * (len(self.values) - 1))
+
+class LLMCache:
+    """
+    Two-tier cache for LLM results
+
+    1. Exact tier: LRU keyed on the blake2b digest of the namespaced cache key
+    2. Semantic tier: normalized embeddings of the cache key, kept as one matrix per
+       namespace; a hit is returned when cosine similarity with a stored key reaches the
+       configured threshold
+
+    Entries expire after a per-namespace TTL. The semantic tier is skipped when no
+    embedder is given or the embedder fails. When a path is given, the exact tier is also
+    written through to a SQLite file so entries survive restarts; the file is swept of
+    expired rows when opened and every few writes, and capped at max_rows.
+    """
+
+    def __init__(self, embedder: Optional[Callable[[str], Optional[Vector]]] = None,
+                 maxsize: int = Config.LLM_CACHE_SIZE, threshold: float = Config.SEMANTIC_CACHE_THRESHOLD,
+                 path: Optional[str] = None, max_rows: int = Config.RESPONSE_CACHE_MAX_ROWS):
+        self.embedder = embedder
+        self.maxsize = maxsize
+        self.threshold = threshold
+        self.path = path
+        self.max_rows = max_rows
+        self._writes = 0  # Persistent writes since the last prune
+        self._exact: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()  # digest -> (expires_at, value)
+        self._semantic: Dict[str, _SemanticIndex] = {}
+        self._embeddings: "OrderedDict[str, np.ndarray]" = OrderedDict()  # Key text -> normalized embedding
+        self._db: Optional[sqlite3.Connection] = None  # Opened on first use
+        self._lock = threading.Lock()  # Research steps run concurrently in worker threads
+
+    @staticmethod
+    def _digest(namespace: str, key: str) -> str:
+        return hashlib.blake2b(f"{namespace}\0{key}".encode("utf-8"), digest_size=16).hexdigest()
+
+    @staticmethod
+    def _normalize(vector: Vector) -> Optional[np.ndarray]:
+        array = np.asarray(vector, dtype=np.float32)
+        norm = float(np.linalg.norm(array))
+        return array / norm if norm else None
+
+    def _embed(self, key: str) -> Optional[np.ndarray]:
+        """
+        Embed a cache key, or None if semantic matching is unavailable
+
+        Embeddings are memoized by key text, so a key that misses again (failed results
+        aren't stored) or is looked up from another namespace isn't re-encoded.
+        """
+        if not self.embedder:
+            return None
+        with self._lock:
+            embedding = self._embeddings.get(key)
+            if embedding is not None:
+                self._embeddings.move_to_end(key)
+                return embedding
+        try:
+            vector = self.embedder(key)
+        except Exception as e:
+            logger.warning("Cache embedding failed: %s", e)
+            return None
+        embedding = self._normalize(vector) if vector is not None and len(vector) else None
+        if embedding is not None:
+            with self._lock:
+                self._embeddings[key] = embedding
+                if len(self._embeddings) > self.maxsize:
+                    self._embeddings.popitem(last=False)
+        return embedding
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        """Open the persistent store, disabling it if the file can't be used (call with the lock held)"""
+        if self._db is None and self.path:
+            try:
+                self._db = sqlite3.connect(self.path, check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS entries (digest TEXT PRIMARY KEY, expires_at REAL, value TEXT)"
+                )
+                self._db.execute("CREATE INDEX IF NOT EXISTS entries_expires_at ON entries (expires_at)")
+                self._prune(self._db)
+            except sqlite3.Error as e:
+                logger.warning("Persistent cache disabled, could not open %s: %s", self.path, e)
+                self._db, self.path = None, None
+        return self._db
+
+    def _prune(self, db: sqlite3.Connection) -> None:
+        """Delete expired rows, then the soonest-to-expire rows beyond max_rows (call with the lock held)"""
+        db.execute("DELETE FROM entries WHERE expires_at <= ?", (time.time(),))
+        db.execute(
+            "DELETE FROM entries WHERE digest NOT IN "
+            "(SELECT digest FROM entries ORDER BY expires_at DESC LIMIT ?)",
+            (self.max_rows,)
+        )
+        db.commit()
+        self._writes = 0
+
+    def _get_exact(self, digest: str) -> Any:
+        now = time.time()
+        with self._lock:
+            entry = self._exact.get(digest)
+            if entry is not None and entry[0] <= now:
+                del self._exact[digest]
+                entry = None
+            if entry is None:
+                entry = self._load(digest, now)
+                if entry is None:
+                    return _MISS
+                self._exact[digest] = entry
+            self._exact.move_to_end(digest)
+            return entry[1]
+
+    def _load(self, digest: str, now: float) -> Optional[Tuple[float, Any]]:
+        """Read an unexpired entry from the persistent store (call with the lock held)"""
+        db = self._connect()
+        if db is None:
+            return None
+        try:
+            row = db.execute("SELECT expires_at, value FROM entries WHERE digest = ?", (digest,)).fetchone()
+            if row is None:
+                return None
+            if row[0] <= now:
+                db.execute("DELETE FROM entries WHERE digest = ?", (digest,))
+                db.commit()
+                return None
+            return row[0], _loads(row[1])
+        except (sqlite3.Error, ValueError) as e:
+            logger.warning("Persistent cache read failed: %s", e)
+            return None
+
+    def _get_similar(self, namespace: str, embedding: np.ndarray) -> Any:
+        with self._lock:
+            index = self._semantic.get(namespace)
+            if index is None:
+                return _MISS
+            return index.search(embedding, self.threshold, time.time())
+
+    def _store(self, namespace: str, digest: str, embedding: Optional[np.ndarray], ttl: float, value: Any) -> None:
+        expires_at = time.time() + ttl
+        with self._lock:
+            self._exact[digest] = (expires_at, value)
+            self._exact.move_to_end(digest)
+            if len(self._exact) > self.maxsize:
+                self._exact.popitem(last=False)
+
+            db = self._connect()
+            if db is not None:
+                try:
+                    db.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?)", (digest, expires_at, _dumps(value)))
+                    db.commit()
+                    self._writes += 1
+                    if self._writes >= Config.RESPONSE_CACHE_PRUNE_EVERY:
+                        self._prune(db)
+                except (sqlite3.Error, TypeError, ValueError) as e:
+                    logger.warning("Persistent cache write failed: %s", e)
+
+            if embedding is not None:
+                self._semantic.setdefault(namespace, _SemanticIndex()).add(embedding, expires_at, value, self.maxsize)
+
+    def get_or_compute(self, namespace: str, key: str, ttl: float, compute: Callable[[], Any]) -> Any:
+        """
+        Return a cached value for key, computing and storing it on a miss
+
+        Args:
+            namespace: Cache partition, so different prompts never match each other
+            key: Text describing the request (only the fields the prompt varies on)
+            ttl: Seconds the computed value stays valid
+            compute: Produces the value on a miss
+
+        Returns:
+            Cached or freshly computed value
+        """
+        digest = self._digest(namespace, key)
+        value = self._get_exact(digest)
+        if value is not _MISS:
+            return value
+
+        embedding = self._embed(key)
+        if embedding is not None:
+            value = self._get_similar(namespace, embedding)
+            if value is not _MISS:
+                return value
+
+        value = compute()
+        if self._is_cacheable(value):
+            self._store(namespace, digest, embedding, ttl, value)
+        return value
+
+    @staticmethod
+    def _is_cacheable(value: Any) -> bool:
+        """Failed calls are retried next time rather than served from the cache"""
+        if not value:
+            return False
+        if isinstance(value, dict):
+            return value.get("status") == "success"
+        return True
+
+    def clear(self) -> None:
+        """Drop all cached entries, including persisted ones"""
+        with self._lock:
+            self._exact.clear()
+            self._semantic.clear()
+            self._embeddings.clear()
+            db = self._connect()
+            if db is not None:
+                db.execute("DELETE FROM entries")
+                db.commit()
+
+def load_local_embedder(model_name: str = Config.LOCAL_EMBEDDING_MODEL) -> Optional[Callable[[str], Optional[np.ndarray]]]:
+    """
+    Return a local sentence-transformers embedder, or None if the package is not installed
+
+    Embedding locally saves a Gemini round-trip on every semantic lookup. The model is
+    loaded on the first call rather than at import.
+    """
+    try:
+        from sentence_transformers import SentenceTransformer
+    except ImportError:
+        return None
+
+    model = None
+    load_lock = threading.Lock()
+
+    def embed(text: str) -> Optional[np.ndarray]:
+        nonlocal model
+        with load_lock:
+            if model is None:
+                model = SentenceTransformer(model_name)
+        return model.encode(text, normalize_embeddings=True)
+
+    return embed
+
+def cached_llm_call(namespace: str, ttl: float, key: Callable[..., Optional[str]],
+                    scope: Optional[Callable[..., str]] = None):
+    """
+    Decorate a method so its result is served from the instance's llm_cache
+
+    Args:
+        namespace: Cache partition for the decorated method
+        ttl: Seconds results stay valid
+        key: Builds the cache key from the method arguments; returning None bypasses the cache.
+            Only free text belongs here, since it is what the semantic tier embeds
+        scope: Builds an exact-match partition from categorical arguments (tone, post type,
+            audience), so a semantic hit never crosses into a different scope
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            cache_key = key(*args, **kwargs)
+            cache = getattr(self, "llm_cache", None)
+            if cache is None or cache_key is None:
+                return method(self, *args, **kwargs)
+            partition = f"{namespace}\0{scope(*args, **kwargs)}" if scope else namespace
+            return cache.get_or_compute(partition, cache_key, ttl, lambda: method(self, *args, **kwargs))
+        return wrapper
+    return decorator
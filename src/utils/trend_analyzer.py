@@ -2,15 +2,175 @@
 Trend Analysis and Content Inspiration Module
 Enhanced agentic capabilities for LinkedIn post generation
 """
-from typing import List, Dict, Optional
+from io import StringIO
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+import asyncio
+import logging
+from src.utils.cost_estimator import CostEstimator
 from src.utils.gemini_client import GeminiClient
 from src.config import Config
 
+logger = logging.getLogger(__name__)
+
+# Research answers are compact JSON lists rather than prose: output tokens are the expensive
+# side, and the strategy prompt embeds every research answer verbatim
+_ITEM_LIMIT = "Return JSON with at most 5 short, specific items (under 15 words each) per list."
+
+TRENDS_FIELDS = ("subtopics", "challenges", "angles", "buzzwords", "developments")
+INSPIRATION_FIELDS = ("hooks", "structures", "engagement_drivers", "formats", "language")
+AUDIENCE_FIELDS = ("pain_points", "goals", "terminology", "preferred_formats", "business_impact")
+
+_TRENDS_LISTS = """- subtopics: the top 3 trending subtopics within this area
+- challenges: industry challenges people are discussing
+- angles: content angles that get engagement
+- buzzwords: trending terminology
+- developments: recent developments or news in this space"""
+
+_INSPIRATION_LISTS = """- hooks: opening hooks that grab attention
+- structures: content flow, storytelling and call-to-action patterns
+- engagement_drivers: question formats, story elements and data points that drive comments and shares
+- formats: content formats that work (lists, before/after, lessons learned, industry insights, contrarian views)
+- language: professional power words, industry terms and authentic expressions"""
+
+_AUDIENCE_LISTS = """- pain_points: challenges they face
+- goals: goals and aspirations they have
+- terminology: industry terms they use
+- preferred_formats: formats and level of technical detail they want, given their time constraints
+- business_impact: business and professional development outcomes they care about"""
+
+# Prompt templates, built once at import; optional clauses are filled in (or left empty) per call
+TRENDS_PROMPT = """Analyze current LinkedIn trends related to "{topic}" in 2025{audience_clause}.
+""" + _ITEM_LIMIT + """
+""" + _TRENDS_LISTS
+
+_TRENDS_AUDIENCE_CLAUSE = ", focusing on what is relevant to {audience}"
+
+INSPIRATION_PROMPT = """Identify patterns from high-performing LinkedIn posts about "{topic}"{focus_clause}.
+""" + _ITEM_LIMIT + """
+""" + _INSPIRATION_LISTS
+
+_INSPIRATION_TONE_CLAUSE = " with a {tone} tone"
+_INSPIRATION_POST_TYPE_CLAUSE = " in {post_type} format"
+
+AUDIENCE_PROMPT = """Analyze what {audience} professionals care about regarding "{topic}".
+""" + _ITEM_LIMIT + """
+""" + _AUDIENCE_LISTS
+
+STRATEGY_PROMPT = """Based on the following research, create a strategic content plan for LinkedIn posts about "{topic}":
+
+{research}
+
+Create a strategic content approach that:
+1. Leverages current trends and hot topics
+2. Uses proven engagement patterns
+3. Speaks directly to the target audience's interests
+4. Incorporates successful content structures
+5. Suggests specific angles and approaches
+6. Recommends key messages and themes
+7. Identifies unique value propositions
+
+Format this as concise, actionable guidance for content creation."""
+
+# Research sections of STRATEGY_PROMPT: (result key, heading); only successful results are included
+_STRATEGY_SECTIONS = (
+    ("trends", "TREND ANALYSIS"),
+    ("inspiration", "CONTENT INSPIRATION"),
+    ("audience_insights", "AUDIENCE INSIGHTS"),
+)
+
+# Trends, inspiration and audience research in one call: the shared instructions are sent once
+RESEARCH_PROMPT = """Research LinkedIn content about "{topic}" in 2025 and answer each section.
+""" + _ITEM_LIMIT + """
+
+trends{trends_clause}:
+""" + _TRENDS_LISTS + """
+
+inspiration (patterns from high-performing LinkedIn posts{inspiration_clause}):
+""" + _INSPIRATION_LISTS + """
+{audience_section}"""
+
+_AUDIENCE_SECTION = """
+audience_insights (what {audience} professionals care about regarding the topic):
+""" + _AUDIENCE_LISTS + """
+"""
+
+def _lists_schema(fields: Tuple[str, ...]) -> dict:
+    """Structured output schema for an object of string lists"""
+    return {
+        "type": "OBJECT",
+        "properties": {field: {"type": "ARRAY", "items": {"type": "STRING"}} for field in fields},
+        "required": list(fields),
+        "property_ordering": list(fields)
+    }
+
+TRENDS_SCHEMA = _lists_schema(TRENDS_FIELDS)
+INSPIRATION_SCHEMA = _lists_schema(INSPIRATION_FIELDS)
+AUDIENCE_SCHEMA = _lists_schema(AUDIENCE_FIELDS)
+
+# Structured output for RESEARCH_PROMPT, one object per section
+RESEARCH_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "trends": TRENDS_SCHEMA,
+        "inspiration": INSPIRATION_SCHEMA,
+        "audience_insights": AUDIENCE_SCHEMA
+    },
+    "required": ["trends", "inspiration"],
+    "property_ordering": ["trends", "inspiration", "audience_insights"]
+}
+
+def fit_token_budget(texts: List[str], budget: int) -> List[str]:
+    """
+    Shorten texts so their estimated total stays within budget tokens
+    
+    Texts within an equal share of the budget are kept whole and their unused share goes
+    to the longer ones, which are cut (at a line break where possible) to what is left.
+    
+    Args:
+        texts: Texts sharing the budget
+        budget: Maximum estimated tokens for all texts together
+        
+    Returns:
+        The texts, shortened where needed
+    """
+    tokens = [CostEstimator.estimate_tokens(text) for text in texts]
+    if sum(tokens) <= budget:
+        return texts
+    
+    fitted = list(texts)
+    remaining = budget
+    by_length = sorted(range(len(texts)), key=tokens.__getitem__)
+    for position, index in enumerate(by_length):
+        share = remaining // (len(texts) - position)
+        if tokens[index] <= share:
+            remaining -= tokens[index]
+            continue
+        keep = len(texts[index]) * share // tokens[index]  # Same share of characters as of tokens
+        cut = texts[index][:keep]
+        line_end = cut.rfind("\n")
+        fitted[index] = (cut[:line_end] if line_end > keep // 2 else cut).rstrip() + " ..."
+        remaining -= share
+    return fitted
+
+def render_findings(findings: Dict) -> str:
+    """Render structured research as compact text lines, e.g. "Subtopics: a; b; c" """
+    return "\n".join(
+        f"{field.replace('_', ' ').capitalize()}: {'; '.join(map(str, items))}"
+        for field, items in findings.items() if items
+    )
+
 class TrendAnalyzer:
-    """Analyze trends and find content inspiration for better LinkedIn posts"""
+    """
+    Analyze trends and find content inspiration for better LinkedIn posts
+    
+    GeminiClient retries rate limits, timeouts and server errors with backoff, so an
+    exception reaching these methods is final; it is logged and returned as an error
+    result, letting the agent carry on with the research that did succeed.
+    """
     
-    def __init__(self, gemini_client: GeminiClient):
+    def __init__(self, gemini_client: GeminiClient, cache_ttl: float = Config.RESEARCH_CACHE_TTL):
         self.gemini_client = gemini_client
+        self.cache_ttl = cache_ttl  # Seconds the client caches research and strategy responses
     
     def analyze_current_trends(self, topic: str, audience: str = "") -> Dict:
         """
@@ -24,30 +184,17 @@ class TrendAnalyzer:
             Dictionary with trend analysis
         """
         try:
-            prompt = f"""Analyze current trends and hot topics related to "{topic}" in 2025.
+            prompt = TRENDS_PROMPT.format_map({
+                "topic": topic,
+                "audience_clause": _TRENDS_AUDIENCE_CLAUSE.format(audience=audience) if audience else ""
+            })
             
-            Consider:
-            1. Recent industry developments and news
-            2. Popular discussions on LinkedIn and professional networks
-            3. Emerging technologies or methodologies
-            4. Common challenges professionals are facing
-            5. Popular content formats that are getting engagement
-            {f'6. Specific trends relevant to {audience}' if audience else ''}
-            
-            Provide:
-            - Top 3 trending subtopics within this area
-            - Current industry challenges people are discussing
-            - Popular content angles that get engagement
-            - Buzzwords and terminology that are trending
-            - Recent developments or news in this space
-            
-            Format your response clearly with sections."""
-            
-            response = self.gemini_client.generate_content(prompt)
-            if response:
+            result = self._request_findings(prompt, TRENDS_SCHEMA, "trends")
+            if result:
                 return {
                     "status": "success",
-                    "trends": response,
+                    "trends": result[0],
+                    "details": result[1],
                     "topic": topic,
                     "audience": audience
                 }
@@ -55,6 +202,7 @@ class TrendAnalyzer:
                 return {"status": "error", "message": "Could not analyze trends"}
                 
         except Exception as e:
+            logger.warning("Trend analysis failed: %s", e)
             return {"status": "error", "message": f"Error analyzing trends: {str(e)}"}
     
     def find_content_inspiration(self, topic: str, tone: str = "", post_type: str = "") -> Dict:
@@ -70,45 +218,20 @@ class TrendAnalyzer:
             Dictionary with content inspiration
         """
         try:
-            prompt = f"""Analyze successful LinkedIn content patterns for posts about "{topic}".
-            
-            Based on high-performing LinkedIn posts, identify:
+            prompt = INSPIRATION_PROMPT.format_map({
+                "topic": topic,
+                "focus_clause": "".join((
+                    _INSPIRATION_TONE_CLAUSE.format(tone=tone) if tone else "",
+                    _INSPIRATION_POST_TYPE_CLAUSE.format(post_type=post_type) if post_type else ""
+                ))
+            })
             
-            1. SUCCESSFUL CONTENT STRUCTURES:
-            - Opening hooks that grab attention
-            - Content flow patterns that work
-            - Effective storytelling techniques
-            - Call-to-action patterns that drive engagement
-            
-            2. ENGAGEMENT DRIVERS:
-            - Question formats that generate comments
-            - Story elements that resonate with professionals
-            - Data points and statistics that get shared
-            - Personal experiences that connect with audiences
-            
-            3. CONTENT FORMATS THAT WORK:
-            - List formats (3 tips, 5 strategies, etc.)
-            - Before/after narratives
-            - Lesson learned stories
-            - Industry insight posts
-            - Contrarian viewpoints that spark discussion
-            
-            4. PROFESSIONAL LANGUAGE PATTERNS:
-            - Power words that professionals use
-            - Industry-specific terminology
-            - Confidence-building language
-            - Authentic, relatable expressions
-            
-            {f'5. Tailor recommendations for {tone} tone' if tone else ''}
-            {f'6. Focus on {post_type} format specifically' if post_type else ''}
-            
-            Provide specific examples and patterns, not just generic advice."""
-            
-            response = self.gemini_client.generate_content(prompt)
-            if response:
+            result = self._request_findings(prompt, INSPIRATION_SCHEMA, "inspiration")
+            if result:
                 return {
                     "status": "success",
-                    "inspiration": response,
+                    "inspiration": result[0],
+                    "details": result[1],
                     "topic": topic,
                     "tone": tone,
                     "post_type": post_type
@@ -117,6 +240,7 @@ class TrendAnalyzer:
                 return {"status": "error", "message": "Could not find content inspiration"}
                 
         except Exception as e:
+            logger.warning("Inspiration search failed: %s", e)
             return {"status": "error", "message": f"Error finding inspiration: {str(e)}"}
     
     def analyze_audience_interests(self, audience: str, topic: str) -> Dict:
@@ -134,25 +258,14 @@ class TrendAnalyzer:
             return {"status": "skipped", "message": "No audience specified"}
         
         try:
-            prompt = f"""Analyze what {audience} professionals care about regarding "{topic}".
-            
-            Consider:
-            1. Pain points and challenges they face
-            2. Goals and aspirations they have
-            3. Industry terminology they use
-            4. Content formats they prefer
-            5. Level of technical detail they want
-            6. Time constraints and information consumption habits
-            7. Professional development interests
-            8. Business impact they care about
-            
-            Provide insights that will help create more targeted, relevant content."""
+            prompt = AUDIENCE_PROMPT.format_map({"audience": audience, "topic": topic})
             
-            response = self.gemini_client.generate_content(prompt)
-            if response:
+            result = self._request_findings(prompt, AUDIENCE_SCHEMA, "audience")
+            if result:
                 return {
                     "status": "success",
-                    "audience_insights": response,
+                    "audience_insights": result[0],
+                    "details": result[1],
                     "audience": audience,
                     "topic": topic
                 }
@@ -160,8 +273,30 @@ class TrendAnalyzer:
                 return {"status": "error", "message": "Could not analyze audience"}
                 
         except Exception as e:
+            logger.warning("Audience analysis failed: %s", e)
             return {"status": "error", "message": f"Error analyzing audience: {str(e)}"}
     
+    def _request_findings(self, prompt: str, schema: dict, route: str) -> Optional[Tuple[str, Optional[Dict]]]:
+        """
+        Request structured research and render it for the downstream prompts
+        
+        Returns:
+            (rendered text, parsed findings), the raw text with None findings if the
+            response isn't the expected JSON, or None if there was no response
+        """
+        response = self.gemini_client.generate_content(
+            prompt, response_schema=schema, cache_ttl=self.cache_ttl, model=Config.MODEL_ROUTING.get(route)
+        )
+        if not response:
+            return None
+        try:
+            findings = GeminiClient.parse_json(response)
+        except ValueError:
+            return response, None
+        if not isinstance(findings, dict):
+            return response, None
+        return render_findings(findings), findings
+    
     def generate_content_strategy(self, topic: str, trends: Dict, inspiration: Dict, audience_insights: Dict) -> str:
         """
         Generate a comprehensive content strategy based on all analysis
@@ -176,30 +311,197 @@ class TrendAnalyzer:
             Content strategy recommendations
         """
         try:
-            strategy_prompt = f"""Based on the following research, create a strategic content plan for LinkedIn posts about "{topic}":
-
-TREND ANALYSIS:
-{trends.get('trends', 'No trend data available')}
-
-CONTENT INSPIRATION:
-{inspiration.get('inspiration', 'No inspiration data available')}
-
-AUDIENCE INSIGHTS:
-{audience_insights.get('audience_insights', 'No audience data available')}
-
-Create a strategic content approach that:
-1. Leverages current trends and hot topics
-2. Uses proven engagement patterns
-3. Speaks directly to the target audience's interests
-4. Incorporates successful content structures
-5. Suggests specific angles and approaches
-6. Recommends key messages and themes
-7. Identifies unique value propositions
-
-Format this as actionable guidance for content creation."""
-
-            response = self.gemini_client.generate_content(strategy_prompt)
+            response = self.gemini_client.generate_content(
+                self._strategy_prompt(topic, trends, inspiration, audience_insights),
+                cache_ttl=self.cache_ttl, model=Config.MODEL_ROUTING.get("strategy")
+            )
             return response or "Could not generate content strategy"
             
         except Exception as e:
+            logger.warning("Strategy generation failed: %s", e)
             return f"Error generating strategy: {str(e)}"
+    
+    def stream_content_strategy(self, topic: str, trends: Dict, inspiration: Dict, audience_insights: Dict,
+                                chunk_cb: Optional[Callable[[str], None]] = None) -> str:
+        """
+        Generate the content strategy by streaming, handing each chunk to chunk_cb as it arrives
+        
+        Unlike generate_content_strategy the response is not cached, so use this where
+        the text is shown while it is written.
+        
+        Args:
+            topic: Main topic
+            trends: Trend analysis results
+            inspiration: Content inspiration results
+            audience_insights: Audience analysis results
+            chunk_cb: Optional callback receiving each text chunk
+            
+        Returns:
+            Content strategy recommendations
+        """
+        buffer = StringIO()
+        try:
+            for chunk in self.gemini_client.generate_content_stream(
+                self._strategy_prompt(topic, trends, inspiration, audience_insights),
+                model=Config.MODEL_ROUTING.get("strategy")
+            ):
+                buffer.write(chunk)
+                if chunk_cb:
+                    chunk_cb(chunk)
+        except Exception as e:
+            logger.warning("Strategy streaming failed: %s", e)
+            if not buffer.tell():
+                return f"Error generating strategy: {str(e)}"
+        return buffer.getvalue() or "Could not generate content strategy"
+    
+    @staticmethod
+    def _strategy_prompt(topic: str, trends: Dict, inspiration: Dict, audience_insights: Dict) -> str:
+        """Build the strategy prompt, leaving out research that failed or was skipped"""
+        results = {"trends": trends, "inspiration": inspiration, "audience_insights": audience_insights}
+        included = [
+            (heading, results[key][key]) for key, heading in _STRATEGY_SECTIONS
+            if results[key].get("status") == "success" and results[key].get(key)
+        ]
+        # Raw-text fallbacks can be long; keep the prompt well inside the context window
+        texts = fit_token_budget([text for _, text in included], Config.STRATEGY_RESEARCH_TOKEN_BUDGET)
+        sections = [f"{heading}:\n{text}" for (heading, _), text in zip(included, texts)]
+        return STRATEGY_PROMPT.format_map({
+            "topic": topic,
+            "research": "\n\n".join(sections) if sections else "No research data available."
+        })
+    
+    def analyze_all(self, topic: str, audience: str = "", tone: str = "", post_type: str = "") -> Dict:
+        """
+        Run trend, inspiration and audience research in a single Gemini call
+        
+        Args:
+            topic: Main topic
+            audience: Target audience
+            tone: Desired tone
+            post_type: Type of post
+            
+        Returns:
+            Dictionary with "status" and, on success, "trends", "inspiration" and
+            "audience_insights" in the same shapes as the individual methods return
+        """
+        try:
+            prompt = RESEARCH_PROMPT.format_map({
+                "topic": topic,
+                "trends_clause": f" (focusing on what is relevant to {audience})" if audience else "",
+                "inspiration_clause": "".join((
+                    _INSPIRATION_TONE_CLAUSE.format(tone=tone) if tone else "",
+                    _INSPIRATION_POST_TYPE_CLAUSE.format(post_type=post_type) if post_type else ""
+                )),
+                "audience_section": _AUDIENCE_SECTION.format(audience=audience) if audience else ""
+            })
+            
+            response = self.gemini_client.generate_content(
+                prompt, response_schema=RESEARCH_SCHEMA, cache_ttl=self.cache_ttl,
+                model=Config.MODEL_ROUTING.get("research")
+            )
+            sections = GeminiClient.parse_json(response or "")
+            if not isinstance(sections, dict):
+                return {"status": "error", "message": "Research response was not a JSON object"}
+            trends, inspiration = sections.get("trends"), sections.get("inspiration")
+            audience_findings = sections.get("audience_insights")
+            if not isinstance(trends, dict) or not isinstance(inspiration, dict) or (
+                audience and not isinstance(audience_findings, dict)
+            ):
+                return {"status": "error", "message": "Research response was missing sections"}
+            
+            if audience:
+                audience_insights = {
+                    "status": "success",
+                    "audience_insights": render_findings(audience_findings),
+                    "details": audience_findings,
+                    "audience": audience,
+                    "topic": topic
+                }
+            else:
+                audience_insights = {"status": "skipped", "message": "No audience specified"}
+            
+            return {
+                "status": "success",
+                "trends": {
+                    "status": "success",
+                    "trends": render_findings(trends),
+                    "details": trends,
+                    "topic": topic,
+                    "audience": audience
+                },
+                "inspiration": {
+                    "status": "success",
+                    "inspiration": render_findings(inspiration),
+                    "details": inspiration,
+                    "topic": topic,
+                    "tone": tone,
+                    "post_type": post_type
+                },
+                "audience_insights": audience_insights
+            }
+            
+        except Exception as e:
+            logger.warning("Combined research failed: %s", e)
+            return {"status": "error", "message": f"Error researching topic: {str(e)}"}
+    
+    async def analyze_all_async(self, topic: str, audience: str = "", tone: str = "", post_type: str = "") -> Dict:
+        """Async variant of analyze_all so it can run alongside other Gemini calls"""
+        return await asyncio.to_thread(self.analyze_all, topic, audience, tone, post_type)
+    
+    async def analyze_current_trends_async(self, topic: str, audience: str = "") -> Dict:
+        """Async variant of analyze_current_trends so it can run alongside other Gemini calls"""
+        return await asyncio.to_thread(self.analyze_current_trends, topic, audience)
+    
+    async def find_content_inspiration_async(self, topic: str, tone: str = "", post_type: str = "") -> Dict:
+        """Async variant of find_content_inspiration so it can run alongside other Gemini calls"""
+        return await asyncio.to_thread(self.find_content_inspiration, topic, tone, post_type)
+    
+    async def analyze_audience_interests_async(self, audience: str, topic: str) -> Dict:
+        """Async variant of analyze_audience_interests so it can run alongside other Gemini calls"""
+        return await asyncio.to_thread(self.analyze_audience_interests, audience, topic)
+    
+    async def generate_content_strategy_async(self, topic: str, trends: Dict, inspiration: Dict, audience_insights: Dict) -> str:
+        """Async variant of generate_content_strategy that keeps the event loop free"""
+        return await asyncio.to_thread(self.generate_content_strategy, topic, trends, inspiration, audience_insights)
+    
+    async def stream_content_strategy_async(self, topic: str, trends: Dict, inspiration: Dict,
+                                            audience_insights: Dict) -> AsyncIterator[str]:
+        """
+        Async generator variant of stream_content_strategy for UI layers
+        
+        Yields:
+            Strategy text chunks as they arrive from the model
+        """
+        async for chunk in self.gemini_client.generate_content_stream_async(
+            self._strategy_prompt(topic, trends, inspiration, audience_insights),
+            model=Config.MODEL_ROUTING.get("strategy")
+        ):
+            yield chunk
+    
+    async def build_strategy_async(self, topic: str, audience: str = "", tone: str = "", post_type: str = "") -> str:
+        """
+        Run the full research pipeline and return the content strategy
+        
+        Trends, inspiration and audience analysis share one Gemini call (or run
+        concurrently if that fails); only the strategy waits for all three.
+        
+        Args:
+            topic: Main topic
+            audience: Target audience
+            tone: Desired tone
+            post_type: Type of post
+            
+        Returns:
+            Content strategy recommendations
+        """
+        research = await self.analyze_all_async(topic, audience, tone, post_type)
+        if research["status"] == "success":
+            trends, inspiration, audience_insights = research["trends"], research["inspiration"], research["audience_insights"]
+        else:
+            # Fall back to the individual calls, which run concurrently
+            trends, inspiration, audience_insights = await asyncio.gather(
+                self.analyze_current_trends_async(topic, audience),
+                self.find_content_inspiration_async(topic, tone, post_type),
+                self.analyze_audience_interests_async(audience, topic)
+            )
+        return await self.generate_content_strategy_async(topic, trends, inspiration, audience_insights)
@@ -0,0 +1,81 @@
+"""
+Shared fixtures for the LinkedIn Post Generator tests
+
+Tests marked `live` call the Gemini API and are skipped when GEMINI_API_KEY is not set;
+everything else runs offline against StubClient.
+"""
+from types import SimpleNamespace
+from typing import Callable, List, Optional, Tuple
+import pytest
+
+from src.config import Config
+from src.agents.linkedin_post_agent import LinkedInPostAgent
+from src.utils import gemini_client as gemini_client_module
+from src.utils.gemini_client import GeminiClient
+
+def pytest_collection_modifyitems(config, items):
+    """Skip live API tests when no API key is configured"""
+    if Config.GEMINI_API_KEY:
+        return
+    skip_live = pytest.mark.skip(reason="GEMINI_API_KEY is not set")
+    for item in items:
+        if "live" in item.keywords:
+            item.add_marker(skip_live)
+
+class StubModels:
+    """Stands in for genai.Client.models, answering every call through respond(model, contents, config)"""
+
+    def __init__(self, respond: Callable[[str, str, Optional[object]], str]):
+        self.respond = respond
+        self.calls: List[Tuple[str, str]] = []  # (model, contents) of every call, probes included
+
+    def generate_content(self, model: str, contents: str, config=None):
+        self.calls.append((model, contents))
+        return SimpleNamespace(text=self.respond(model, contents, config))
+
+    def generate_content_stream(self, model: str, contents: str, config=None):
+        self.calls.append((model, contents))
+        text = self.respond(model, contents, config)
+        for start in range(0, len(text), 64):
+            yield SimpleNamespace(text=text[start:start + 64])
+
+class StubClient:
+    """Offline stand-in for genai.Client; set respond to script the model's answers"""
+
+    def __init__(self, respond: Callable[[str, str, Optional[object]], str] = lambda model, contents, config: "OK"):
+        self.models = StubModels(respond)
+
+    def close(self) -> None:
+        pass
+
+@pytest.fixture
+def stub_client(monkeypatch) -> StubClient:
+    """Stub API client, with persistence and retry delays disabled so tests are isolated and fast"""
+    monkeypatch.setattr(Config, "RESPONSE_CACHE_PATH", "")
+    monkeypatch.setattr(Config, "ENABLE_SEMANTIC_CACHE", False)
+    monkeypatch.setattr(gemini_client_module, "_backoff_delay", lambda attempt: 0)
+    return StubClient()
+
+@pytest.fixture
+def gemini_client(stub_client) -> GeminiClient:
+    """GeminiClient on the stub, initialized and with the model probes cleared from the call log"""
+    client = GeminiClient(stub_client)
+    stub_client.models.calls.clear()
+    return client
+
+@pytest.fixture
+def offline_agent(stub_client) -> LinkedInPostAgent:
+    """Agent wired to the stub API client"""
+    return LinkedInPostAgent(client=stub_client)
+
+@pytest.fixture(scope="session")
+def agent():
+    """One agent, and so one Gemini client and HTTP connection pool, per test session (per worker under xdist)"""
+    if not Config.GEMINI_API_KEY:
+        pytest.skip("GEMINI_API_KEY is not set")
+    try:
+        agent = LinkedInPostAgent()
+    except Exception as e:
+        pytest.skip(f"Gemini model unavailable: {str(e)}")
+    yield agent
+    agent.gemini_client.close()
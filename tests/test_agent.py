@@ -0,0 +1,15 @@
+"""
+Agent initialization tests for LinkedIn Post Generator
+"""
+import pytest
+
+pytestmark = pytest.mark.live  # Calls the Gemini API
+
+def test_agent_initialization(agent):
+    """Test agent initialization"""
+    health = agent.get_health_status()
+    if health["status"] == "healthy":
+        print(f"✅ Agent initialized successfully with {health['model_info']['model_name']}")
+    else:
+        print(f"❌ Agent unhealthy: {health['message']}")
+        assert False, f"Agent unhealthy: {health['message']}"
@@ -0,0 +1,17 @@
+"""
+Configuration tests for LinkedIn Post Generator
+"""
+import pytest
+
+from src.config import Config
+
+pytestmark = pytest.mark.live  # Checks the deployment configuration, which needs GEMINI_API_KEY
+
+def test_configuration():
+    """Test configuration validation"""
+    print("Testing configuration...")
+    errors = Config.validate_config()
+    if errors:
+        print(f"❌ Configuration errors: {errors}")
+        assert False, f"Configuration errors: {errors}"
+    print("✅ Configuration valid")
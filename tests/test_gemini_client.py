@@ -0,0 +1,127 @@
+"""
+Offline tests for GeminiClient retries, caching, request sharing and model routing
+"""
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+import pytest
+from google.genai import errors
+
+from src.config import Config
+from src.utils.gemini_client import GeminiClient
+
+def _server_error():
+    return errors.ServerError(503, {"error": {"message": "busy", "status": "UNAVAILABLE"}})
+
+def _client_error(code):
+    return errors.ClientError(code, {"error": {"message": "rejected"}})
+
+def _wait_for(condition, timeout=5.0):
+    """Poll until condition() is true, failing the test after timeout seconds"""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out waiting for in-flight calls"
+        time.sleep(0.01)
+
+def _prompts(stub_client):
+    return [contents for _, contents in stub_client.models.calls]
+
+def test_initializes_first_supported_model(gemini_client):
+    assert gemini_client.model_name == Config.SUPPORTED_MODELS[0]
+
+def test_parse_json_strips_code_fences():
+    assert GeminiClient.parse_json('```json\n{"posts": [1]}\n```') == {"posts": [1]}
+    with pytest.raises(ValueError):
+        GeminiClient.parse_json("not json")
+
+def test_transient_errors_are_retried(gemini_client, stub_client):
+    failures = [_server_error()]
+
+    def respond(model, contents, config):
+        if failures:
+            raise failures.pop()
+        return "recovered"
+
+    stub_client.models.respond = respond
+    assert gemini_client.generate_content("prompt") == "recovered"
+    assert len(stub_client.models.calls) == 2
+
+def test_client_errors_are_not_retried(gemini_client, stub_client):
+    def respond(model, contents, config):
+        raise _client_error(400)
+
+    stub_client.models.respond = respond
+    with pytest.raises(errors.ClientError):
+        gemini_client.generate_content("prompt")
+    assert len(stub_client.models.calls) == 1
+
+def test_cache_ttl_reuses_identical_responses(gemini_client, stub_client):
+    assert gemini_client.generate_content("prompt", cache_ttl=60) == "OK"
+    assert gemini_client.generate_content("prompt", cache_ttl=60) == "OK"
+    gemini_client.generate_content("prompt")  # Uncached calls always reach the API
+    assert len(stub_client.models.calls) == 2
+
+def test_concurrent_identical_requests_share_one_call(gemini_client, stub_client):
+    release = threading.Event()
+
+    def respond(model, contents, config):
+        release.wait(5)
+        return f"answer to {contents}"
+
+    stub_client.models.respond = respond
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(gemini_client.generate_content, "same prompt") for _ in range(3)]
+        other = executor.submit(gemini_client.generate_content, "other prompt")
+        _wait_for(lambda: len(gemini_client._inflight) == 2)  # Both distinct calls are in flight
+        time.sleep(0.1)  # Let the duplicate requests reach the in-flight call
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert results == ["answer to same prompt"] * 3
+    assert other.result() == "answer to other prompt"
+    assert sorted(_prompts(stub_client)) == ["other prompt", "same prompt"]
+    assert not gemini_client._inflight
+
+def test_shared_failure_reaches_every_waiter(gemini_client, stub_client):
+    release = threading.Event()
+
+    def respond(model, contents, config):
+        release.wait(5)
+        raise _client_error(400)
+
+    stub_client.models.respond = respond
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        futures = [executor.submit(gemini_client.generate_content, "prompt") for _ in range(3)]
+        _wait_for(lambda: gemini_client._inflight)
+        release.set()
+        for future in futures:
+            with pytest.raises(errors.ClientError):
+                future.result()
+    assert not gemini_client._inflight
+
+def test_routed_model_alias_is_resolved(gemini_client, stub_client):
+    gemini_client.generate_content("prompt", model="pro")
+    assert stub_client.models.calls[-1][0] == Config.MODEL_ALIASES["pro"]
+
+def test_unavailable_routed_model_falls_back_to_default(gemini_client, stub_client):
+    routed = Config.MODEL_ALIASES["pro"]
+
+    def respond(model, contents, config):
+        if model == routed:
+            raise _client_error(404)
+        return f"from {model}"
+
+    stub_client.models.respond = respond
+    assert gemini_client.generate_content("prompt", model="pro") == f"from {gemini_client.model_name}"
+    assert routed in gemini_client._unavailable_models
+
+    stub_client.models.calls.clear()
+    gemini_client.generate_content("prompt", model="pro")
+    assert [model for model, _ in stub_client.models.calls] == [gemini_client.model_name]
+
+def test_stream_yields_chunks_from_the_routed_model(gemini_client, stub_client):
+    stub_client.models.respond = lambda model, contents, config: "x" * 150
+    chunks = list(gemini_client.generate_content_stream("prompt", model="pro"))
+    assert "".join(chunks) == "x" * 150
+    assert len(chunks) > 1
+    assert stub_client.models.calls[-1][0] == Config.MODEL_ALIASES["pro"]
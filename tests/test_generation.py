@@ -0,0 +1,39 @@
+"""
+Post generation tests for LinkedIn Post Generator
+
+Each case is an independent generation, so `pytest -n auto` (pytest-xdist) runs them in
+parallel; research responses are cached, so reruns mostly skip the research calls.
+"""
+import pytest
+
+from src.agents.linkedin_post_agent import PostRequest
+
+pytestmark = pytest.mark.live  # Calls the Gemini API
+
+@pytest.mark.parametrize("tone,audience,post_type", [
+    ("Professional", "business leaders", ""),
+    ("Conversational", "software engineers", "Tips"),
+    ("Educational", "students", "Tutorial"),
+    ("Thought Leadership", "", "Industry Insight"),
+])
+def test_post_generation(agent, tone, audience, post_type):
+    """Test post generation"""
+    print(f"Testing post generation ({tone}, {audience or 'no audience'}, {post_type or 'any type'})...")
+    request = PostRequest(
+        topic="AI in business transformation",
+        tone=tone,
+        audience=audience,
+        post_type=post_type,
+        post_count=2,
+        include_hashtags=True
+    )
+    
+    posts, metadata = agent.generate_posts(request)
+    
+    if posts:
+        print(f"✅ Generated {len(posts)} posts successfully")
+        print(f"   Model: {metadata.get('model_used', 'N/A')}")
+        print(f"   Time: {metadata.get('generation_time', 0):.2f}s")
+    else:
+        print(f"❌ No posts generated. Error: {metadata.get('error', 'Unknown')}")
+        assert False, f"No posts generated: {metadata.get('error', 'Unknown')}"
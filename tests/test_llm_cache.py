@@ -0,0 +1,176 @@
+"""
+Offline tests for the two-tier LLM response cache
+"""
+import sqlite3
+
+from src.config import Config
+from src.utils.llm_cache import LLMCache, cached_llm_call
+
+class Counter:
+    """compute() callable that counts its calls"""
+
+    def __init__(self, value="value"):
+        self.value = value
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.value
+
+def test_exact_hit_skips_compute():
+    cache = LLMCache()
+    compute = Counter()
+    assert cache.get_or_compute("ns", "key", 60, compute) == "value"
+    assert cache.get_or_compute("ns", "key", 60, compute) == "value"
+    assert compute.calls == 1
+
+def test_namespaces_are_separate():
+    cache = LLMCache()
+    compute = Counter()
+    cache.get_or_compute("trends", "key", 60, compute)
+    cache.get_or_compute("inspiration", "key", 60, compute)
+    assert compute.calls == 2
+
+def test_expired_entry_is_recomputed():
+    cache = LLMCache()
+    compute = Counter()
+    cache.get_or_compute("ns", "key", 0, compute)
+    cache.get_or_compute("ns", "key", 0, compute)
+    assert compute.calls == 2
+
+def test_failed_results_are_not_cached():
+    cache = LLMCache()
+    failure = Counter({"status": "error", "message": "boom"})
+    cache.get_or_compute("ns", "key", 60, failure)
+    cache.get_or_compute("ns", "key", 60, failure)
+    assert failure.calls == 2
+
+    empty = Counter(None)
+    cache.get_or_compute("ns", "other", 60, empty)
+    cache.get_or_compute("ns", "other", 60, empty)
+    assert empty.calls == 2
+
+def test_lru_eviction():
+    cache = LLMCache(maxsize=2)
+    compute = Counter()
+    for key in ("a", "b", "a", "c"):  # "b" is least recently used when "c" arrives
+        cache.get_or_compute("ns", key, 60, compute)
+    assert compute.calls == 3
+    cache.get_or_compute("ns", "a", 60, compute)
+    assert compute.calls == 3
+    cache.get_or_compute("ns", "b", 60, compute)
+    assert compute.calls == 4
+
+def test_semantic_hit_above_threshold():
+    vectors = {"AI in business": [1.0, 0.0], "AI for business": [0.99, 0.05], "Gardening": [0.0, 1.0]}
+    cache = LLMCache(embedder=vectors.get, threshold=0.92)
+    cache.get_or_compute("ns", "AI in business", 60, Counter("first"))
+
+    similar = Counter("second")
+    assert cache.get_or_compute("ns", "AI for business", 60, similar) == "first"
+    assert similar.calls == 0
+
+    unrelated = Counter("third")
+    assert cache.get_or_compute("ns", "Gardening", 60, unrelated) == "third"
+    assert unrelated.calls == 1
+
+def test_embedder_failure_falls_back_to_exact_tier():
+    def embedder(text):
+        raise RuntimeError("embedding service down")
+
+    cache = LLMCache(embedder=embedder)
+    compute = Counter()
+    cache.get_or_compute("ns", "key", 60, compute)
+    cache.get_or_compute("ns", "key", 60, compute)
+    assert compute.calls == 1
+
+def test_embeddings_are_memoized_by_key_text():
+    embedded = []
+    cache = LLMCache(embedder=lambda text: embedded.append(text) or [1.0, 0.0])
+    failure = Counter({"status": "error"})  # Not stored, so the key misses again
+    cache.get_or_compute("ns", "key", 60, failure)
+    cache.get_or_compute("ns", "key", 60, failure)
+    cache.get_or_compute("other", "key", 60, failure)
+    assert embedded == ["key"]
+
+def test_persistent_entries_survive_a_new_instance(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    LLMCache(path=path).get_or_compute("ns", "key", 60, Counter({"status": "success", "text": "é"}))
+
+    compute = Counter()
+    assert LLMCache(path=path).get_or_compute("ns", "key", 60, compute) == {"status": "success", "text": "é"}
+    assert compute.calls == 0
+
+def test_clear_drops_persisted_entries(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = LLMCache(path=path)
+    cache.get_or_compute("ns", "key", 60, Counter())
+    cache.clear()
+
+    compute = Counter()
+    LLMCache(path=path).get_or_compute("ns", "key", 60, compute)
+    assert compute.calls == 1
+
+def _row_count(path):
+    db = sqlite3.connect(path)
+    try:
+        return db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+    finally:
+        db.close()
+
+def test_expired_rows_are_swept_when_the_store_opens(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = LLMCache(path=path)
+    cache.get_or_compute("ns", "one-off", 0, Counter())
+    cache.get_or_compute("ns", "kept", 60, Counter())
+    assert _row_count(path) == 2
+
+    LLMCache(path=path).get_or_compute("ns", "kept", 60, Counter())
+    assert _row_count(path) == 1
+
+def test_rows_beyond_the_cap_are_pruned(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "RESPONSE_CACHE_PRUNE_EVERY", 2)
+    path = str(tmp_path / "cache.sqlite3")
+    cache = LLMCache(path=path, max_rows=3)
+    for ttl, key in enumerate("abcd", start=60):  # "a" expires first
+        cache.get_or_compute("ns", key, ttl, Counter())
+    assert _row_count(path) == 3
+
+    compute = Counter()
+    fresh = LLMCache(path=path, max_rows=3)
+    fresh.get_or_compute("ns", "d", 60, compute)
+    fresh.get_or_compute("ns", "a", 60, compute)
+    assert compute.calls == 1
+
+def test_unusable_path_disables_persistence(tmp_path):
+    cache = LLMCache(path=str(tmp_path / "missing" / "cache.sqlite3"))
+    compute = Counter()
+    cache.get_or_compute("ns", "key", 60, compute)
+    cache.get_or_compute("ns", "key", 60, compute)
+    assert compute.calls == 1
+    assert cache.path is None
+
+class Researcher:
+    """Minimal owner of an llm_cache for the decorator tests"""
+
+    def __init__(self, embedder=None):
+        self.llm_cache = LLMCache(embedder=embedder)
+        self.calls = 0
+
+    @cached_llm_call("inspiration", 60, key=lambda topic, tone: topic or None, scope=lambda topic, tone: tone)
+    def research(self, topic, tone):
+        self.calls += 1
+        return {"status": "success", "topic": topic, "tone": tone}
+
+def test_scope_keeps_semantic_hits_within_categorical_fields():
+    researcher = Researcher(embedder=lambda text: [1.0, 0.0])  # Every topic embeds identically
+    researcher.research("AI", "Professional")
+    assert researcher.research("AI", "Conversational")["tone"] == "Conversational"
+    assert researcher.research("AI tools", "Professional")["topic"] == "AI"
+    assert researcher.calls == 2
+
+def test_none_key_bypasses_cache():
+    researcher = Researcher()
+    researcher.research("", "Professional")
+    researcher.research("", "Professional")
+    assert researcher.calls == 2
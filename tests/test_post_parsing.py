@@ -0,0 +1,91 @@
+"""
+Offline tests for parsing generated posts, splicing rewrites of rejected posts and tone selection
+"""
+import asyncio
+import json
+
+from src.agents.linkedin_post_agent import PostRequest
+
+POST_A = "Artificial intelligence is reshaping how teams plan, build and ship products. " * 3
+POST_B = "Leaders who invest in upskilling see faster adoption and better outcomes overall. " * 3
+
+def test_split_post_sections_handles_headers_and_placeholders(offline_agent):
+    response = (
+        f"**Post 1:** [Content focused on trending angle #1] {POST_A}\n\n"
+        f"## Post 2:\n{POST_B} Keep [brackets] in the post."
+    )
+    sections = offline_agent._split_post_sections(response)
+    assert sections == [POST_A.strip(), f"{POST_B} Keep [brackets] in the post.".strip()]
+
+def test_parse_posts_drops_short_fragments(offline_agent):
+    assert offline_agent._parse_posts(f"Post 1: too short\nPost 2: {POST_A}") == [POST_A.strip()]
+
+def test_stream_draft_contents_reads_unterminated_json(offline_agent):
+    partial = json.dumps({"posts": [{"content": POST_A + "é \"quoted\"", "quality": {}}]})[:-3]
+    partial += ', {"content": "Second draft with a cut escape \\u00'
+    drafts = offline_agent._stream_draft_contents(partial)
+    assert drafts[0] == (POST_A + "é \"quoted\"").strip()
+    assert drafts[1] == "Second draft with a cut escape"
+
+def test_stream_draft_contents_falls_back_to_post_headers(offline_agent):
+    assert offline_agent._stream_draft_contents(f"Post 1: {POST_A}") == [POST_A.strip()]
+
+def test_parse_structured_posts(offline_agent):
+    quality = {"engagement": 8, "tone": 7, "clarity": 9.0, "value": "high", "cta": 6}
+    response = json.dumps({
+        "posts": [{"content": POST_A, "quality": quality}, {"content": "short"}, "not a post"],
+        "hashtags": ["#AI", "Leadership"]
+    })
+    drafts = offline_agent._parse_structured_posts(response, "Professional")
+    assert drafts.posts == [POST_A.strip()]
+    assert drafts.metrics == {POST_A.strip(): {"engagement": 8, "tone": 7, "clarity": 9, "cta": 6}}
+    assert drafts.hashtags == ["#AI", "Leadership"]
+    assert drafts.tone == "Professional"
+
+def test_parse_structured_posts_falls_back_to_text(offline_agent):
+    drafts = offline_agent._parse_structured_posts(f"Post 1: {POST_A}", "Educational")
+    assert drafts.posts == [POST_A.strip()]
+    assert drafts.metrics == {}
+    assert drafts.hashtags == []
+
+def test_rejected_posts_are_rewritten_in_place(offline_agent, monkeypatch):
+    rewrite = "A rewritten, more professional take on the same idea for LinkedIn readers. " * 2
+    verdicts = {POST_A: (False, "FAIL: too salesy"), POST_B: (True, "PASS"), rewrite: (True, "PASS")}
+
+    async def screen_posts(posts, metrics):
+        return [verdicts[post] for post in posts]
+
+    async def regenerate_post(post, reason, request):
+        assert (post, reason) == (POST_A, "FAIL: too salesy")
+        return rewrite
+
+    monkeypatch.setattr(offline_agent, "_screen_posts", screen_posts)
+    monkeypatch.setattr(offline_agent, "_regenerate_post", regenerate_post)
+    posts = asyncio.run(offline_agent._filter_and_validate_posts(
+        [POST_A, "tiny", POST_B], PostRequest(topic="AI"), {}
+    ))
+    assert posts == [rewrite, POST_B]
+
+def test_posts_still_rejected_after_rewrite_are_dropped(offline_agent, monkeypatch):
+    async def screen_posts(posts, metrics):
+        return [(False, "FAIL: off topic") if post != POST_B else (True, "PASS") for post in posts]
+
+    async def regenerate_post(post, reason, request):
+        return POST_A + " Revised."
+
+    monkeypatch.setattr(offline_agent, "_screen_posts", screen_posts)
+    monkeypatch.setattr(offline_agent, "_regenerate_post", regenerate_post)
+    posts = asyncio.run(offline_agent._filter_and_validate_posts([POST_A, POST_B], PostRequest(topic="AI"), {}))
+    assert posts == [POST_B]
+    assert offline_agent.generation_stats["total_filtered"] == 1
+
+def test_failed_tone_selection_is_not_cached(offline_agent, stub_client):
+    stub_client.models.respond = lambda model, contents, config: "No idea"
+    request = PostRequest(topic="AI", audience="Founders")
+    assert offline_agent._determine_effective_tone(request, {}, {}) == "Professional"
+
+    stub_client.models.calls.clear()
+    stub_client.models.respond = lambda model, contents, config: "Inspirational: it motivates founders"
+    assert offline_agent._determine_effective_tone(request, {}, {}) == "Inspirational"
+    assert offline_agent._determine_effective_tone(request, {}, {}) == "Inspirational"  # Successful pick is cached
+    assert len(stub_client.models.calls) == 1
@@ -0,0 +1,67 @@
+"""
+Offline tests for the text helpers in src/utils
+"""
+from src.config import Config
+from src.utils.clipboard_helper import _escape_for_javascript
+from src.utils.content_filter import ContentFilter
+from src.utils.cost_estimator import CostEstimator
+from src.utils.hashtag_generator import HashtagGenerator
+from src.utils.trend_analyzer import fit_token_budget, render_findings
+
+def test_fit_token_budget_keeps_texts_within_budget():
+    texts = ["short", "line one\n" * 1000, "x y " * 300]
+    assert fit_token_budget(texts, 10_000) == texts
+
+    fitted = fit_token_budget(texts, 100)
+    assert fitted[0] == "short"  # Within its share, so kept whole
+    assert fitted[1].endswith("line one ...")  # Cut at a line break
+    assert fitted[2].endswith(" ...")
+    assert sum(CostEstimator.estimate_tokens(text) for text in fitted) <= 100 + 2 * 2  # Plus the " ..." markers
+
+def test_render_findings_skips_empty_lists():
+    rendered = render_findings({"subtopics": ["a", "b"], "engagement_drivers": ["questions"], "goals": []})
+    assert rendered == "Subtopics: a; b\nEngagement drivers: questions"
+
+def test_escape_for_javascript():
+    escaped = _escape_for_javascript('He said "hi"\n\'`${value}`\\\r\t')
+    assert escaped == 'He said \\"hi\\"\\n\\\'\\`\\${value}\\`\\\\\\t'
+
+def test_clean_hashtags():
+    candidates = ["#AI", "Leadership", "#AI", "Future of work", "", "#", "#Growth", "#Extra"]
+    assert HashtagGenerator.clean_hashtags(candidates, count=4) == ["#AI", "#Leadership", "#Future", "#Growth"]
+    assert HashtagGenerator.clean_hashtags(candidates, count=0) == []
+
+def test_hashtag_cache_evicts_least_recently_used(gemini_client, stub_client, monkeypatch):
+    monkeypatch.setattr(Config, "HASHTAG_CACHE_SIZE", 2)
+    stub_client.models.respond = lambda model, contents, config: "#AI\n#Growth"
+    generator = HashtagGenerator(gemini_client)
+    for topic in ("a", "b", "a", "c"):  # "b" is least recently used when "c" arrives
+        generator.generate_hashtags(topic)
+    assert len(stub_client.models.calls) == 3
+    generator.generate_hashtags("a")
+    assert len(stub_client.models.calls) == 3
+    generator.generate_hashtags("b")
+    assert len(stub_client.models.calls) == 4
+
+def test_expired_hashtags_are_dropped(gemini_client, stub_client, monkeypatch):
+    monkeypatch.setattr(Config, "HASHTAG_CACHE_TTL", 0)
+    stub_client.models.respond = lambda model, contents, config: "#AI"
+    generator = HashtagGenerator(gemini_client)
+    assert generator.generate_hashtags("AI") == ["#AI"]
+    assert generator.generate_hashtags("AI") == ["#AI"]
+    assert len(stub_client.models.calls) == 2
+    assert generator._cached_hashtags(("AI", "", "", 5)) is None
+    assert not generator._cache  # Expired entries are deleted when read
+
+def test_check_post_quality_parses_scores(gemini_client, stub_client):
+    stub_client.models.respond = lambda model, contents, config: (
+        "SCORE: 7\nENGAGEMENT: 8\nTONE: high\nCLARITY: 9\nVALUE: 6\nCTA: 5\nFEEDBACK: Clear: and useful"
+    )
+    is_quality, feedback, metrics = ContentFilter(gemini_client).check_post_quality("post")
+    assert is_quality
+    assert feedback == "Clear: and useful"
+    assert metrics == {"engagement": 8, "clarity": 9, "value": 6, "cta": 5}  # Malformed TONE line skipped
+
+def test_check_post_quality_low_score(gemini_client, stub_client):
+    stub_client.models.respond = lambda model, contents, config: "SCORE: 4\nFEEDBACK: Too vague"
+    assert ContentFilter(gemini_client).check_post_quality("post") == (False, "Too vague", {})